@@ -1,16 +1,123 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import engine, Base
-from app.routers import supplier,product,order,shipment
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.database import engine, async_engine, Base, ASYNC_MODE, pool_status
+from app.routers import supplier,product,order,shipment,export,stats,changes,report,analytics
+from app.services.cache import response_cache
+from app.services.delivery_service import run_overdue_sweep
+from app.services.idempotency import purge_expired_keys
+from app.services.changes import purge_change_log
+from app.services.inventory_service import run_stock_compaction, run_ledger_compaction
+from app.services.report_service import shutdown_pool
+from app.services.analytics_service import run_analytics_backfill
+from app.services.search_service import install_search_indexes
+from app.services.stats_service import refresh_totals
+from app.services import metrics
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+IDEMPOTENCY_PURGE_SECONDS = 3600
+CHANGE_LOG_PURGE_SECONDS = 3600
+STOCK_LEDGER_COMPACT_SECONDS = 3600
+
+
+async def run_periodically(job, seconds: float):
+    while True:
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("background job %s failed", job.__name__)
+        await asyncio.sleep(seconds)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Builds the analytics rollups for a database that has orders but no rollups yet,
+    # before any write can bump them
+    await run_in_threadpool(run_analytics_backfill)
+    jobs = [
+        asyncio.create_task(run_periodically(purge_expired_keys, IDEMPOTENCY_PURGE_SECONDS)),
+        asyncio.create_task(run_periodically(purge_change_log, CHANGE_LOG_PURGE_SECONDS)),
+        asyncio.create_task(run_periodically(run_ledger_compaction, STOCK_LEDGER_COMPACT_SECONDS)),
+    ]
+    if settings.stock_compact_seconds > 0:
+        # Sharded products' stock is summed back into the product row that list reads use
+        jobs.append(asyncio.create_task(run_periodically(run_stock_compaction, settings.stock_compact_seconds)))
+    if settings.delivery_sweep_seconds > 0:
+        # Pending shipments whose ETA passes without an arrival turn late here, not at read time
+        jobs.append(asyncio.create_task(run_periodically(run_overdue_sweep, settings.delivery_sweep_seconds)))
+    if settings.stats_refresh_seconds > 0:
+        # Dashboard table counts and stock value, so /stats/summary doesn't scan whole tables per request
+        jobs.append(asyncio.create_task(run_periodically(refresh_totals, settings.stats_refresh_seconds)))
+    yield
+    for job in jobs:
+        job.cancel()
+    shutdown_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.install_query_hooks(engine)
+if async_engine is not None:
+    metrics.install_query_hooks(async_engine.sync_engine)
 
 Base.metadata.create_all(bind=engine)
+# create_all skips tables that already exist, so indexes added to their models later are created here
+for table in Base.metadata.tables.values():
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+install_search_indexes(engine)
+
+if ASYNC_MODE:
+    # Async read routers are registered first so their GET routes take precedence;
+    # writes keep going through the sync routers below
+    from app.routers.aio import supplier as aio_supplier, product as aio_product, order as aio_order, shipment as aio_shipment
+    app.include_router(aio_supplier.router)
+    app.include_router(aio_product.router)
+    app.include_router(aio_order.router)
+    app.include_router(aio_shipment.router)
 
 app.include_router(supplier.router)
 app.include_router(product.router)
 app.include_router(order.router)
 app.include_router(shipment.router)
+app.include_router(export.router)
+app.include_router(stats.router)
+app.include_router(changes.router)
+app.include_router(report.router)
+app.include_router(analytics.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Logistics Backend is running 🚚"}
\ No newline at end of file
+    return {"message": "Logistics Backend is running 🚚"}
+
+@app.get("/health/db")
+def read_db_health():
+    # Pool occupancy and checkout wait times; a growing wait means the pool is undersized
+    status = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        status["async"] = pool_status(async_engine.sync_engine)
+    return status
+
+@app.get("/health/cache")
+def read_cache_health():
+    return response_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    # Prometheus text exposition format
+    lines = [metrics.registry.render().rstrip("\n")]
+    metrics.render_pool_metrics(lines, read_db_health())
+    metrics.render_cache_metrics(lines, response_cache.stats())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/slow-queries")
+def read_slow_queries():
+    # Most recent statements over SLOW_QUERY_MS, newest first
+    return list(reversed(metrics.slow_query_log))
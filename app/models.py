@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DECIMAL, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DECIMAL, DateTime, Date, Index, Text
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -22,6 +22,7 @@ class Product(Base):
     unit_price = Column(DECIMAL(10, 2), nullable=False)
     quantity_available = Column(Integer, nullable=False)
     volume_per_unit = Column(DECIMAL(10, 2), default=1.0) # New: Volume per unit
+    stock_shards = Column(Integer, nullable=False, default=1, server_default="1") # >1: stock lives in StockShard rows (see inventory_service)
 
 class Order(Base):
     __tablename__ = "orders"
@@ -37,6 +38,14 @@ class Order(Base):
 
     shipment = relationship("Shipment", back_populates="orders", foreign_keys=[shipment_id])
 
+    __table_args__ = (
+        Index("ix_orders_supplier_id_status", "supplier_id", "status"),
+        Index("ix_orders_product_id", "product_id"),
+        Index("ix_orders_order_date", "order_date"),
+        Index("ix_orders_shipment_id", "shipment_id"),
+        Index("ix_orders_status_shipment_id", "status", "shipment_id"),
+    )
+
 class Shipment(Base):
     __tablename__ = "shipment"
 
@@ -53,9 +62,133 @@ class Shipment(Base):
     extra_charge = Column(DECIMAL(10, 2), default=0.0)
     total_cost = Column(DECIMAL(10, 2), default=0.0)
     cost_reason = Column(String(255), nullable=True)
+    delivery_state = Column(String(20), default="pending") # pending / on_time / late, maintained on write (see delivery_service)
 
     orders = relationship("Order", back_populates="shipment", foreign_keys=[Order.shipment_id])
 
+    __table_args__ = (
+        Index("ix_shipment_order_id", "order_id"),
+        Index("ix_shipment_arrival_dates", "estimated_arrival_date", "actual_arrival_date"),
+        Index("ix_shipment_delivery_state_id", "delivery_state", "shipment_id"), # delayed / on-time lists
+        Index("ix_shipment_delivery_state_eta", "delivery_state", "estimated_arrival_date"), # overdue sweep
+        Index("ix_shipment_status", "status"), # open Waiting shipments for top-up
+    )
+
     @property
     def order_ids(self):
-        return [o.order_id for o in self.orders]
\ No newline at end of file
+        return [o.order_id for o in self.orders]
+
+class SupplierDeliveryStats(Base):
+    __tablename__ = "supplier_delivery_stats"
+
+    # One row per supplier, counts moved incrementally as shipments change delivery_state.
+    # No FK; delete_supplier removes the row itself, so a reused supplier id starts from zero.
+    supplier_id = Column(Integer, primary_key=True)
+    pending = Column(Integer, nullable=False, default=0)
+    on_time = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), primary_key=True) # endpoint, e.g. "POST /orders/"
+    key = Column(String(255), primary_key=True) # client-supplied Idempotency-Key
+    request_hash = Column(String(64), nullable=False) # sha256 of the request body
+    status_code = Column(Integer) # NULL while the first request is still running
+    response_body = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    # Append-only, written in the same transaction as the change it records (see services/changes.py)
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False) # supplier / product / order / shipment
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False) # insert / update / delete
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_changed_at", "changed_at"), # retention purge
+        Index("ix_change_log_entity_seq", "entity", "seq"), # newest change per entity (report versions)
+        {"sqlite_autoincrement": True}, # never reuse a seq, or a client cursor would skip the new entries
+    )
+
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+
+    # Append-only ledger of every change to a product's stock (see services/inventory_service.py)
+    movement_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    product_id = Column(Integer, nullable=False) # no FK: history outlives the product row
+    delta = Column(Integer, nullable=False) # signed change in units
+    reason = Column(String(30), nullable=False) # initial / order / order_cancelled / adjustment / correction
+    order_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_movements_product_id", "product_id", "movement_id"),
+        Index("ix_stock_movements_created_at", "created_at"), # compaction cutoff
+    )
+
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+
+    # Net effect of the movements compacted out of the ledger, per product
+    product_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0) # sum of compacted deltas
+    as_of_movement_id = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False) # last movement folded in
+    taken_at = Column(DateTime, nullable=False)
+
+class StockShard(Base):
+    __tablename__ = "stock_shards"
+
+    # A hot product's stock split across rows, so concurrent orders lock different rows
+    product_id = Column(Integer, primary_key=True) # no FK, like supplier_delivery_stats
+    shard = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+class OrderDailyStats(Base):
+    __tablename__ = "order_daily_stats"
+
+    # Orders per day, supplier and product, bumped in the same transaction as the order (see services/analytics_service.py).
+    # No FKs: history outlives the supplier and product rows.
+    day = Column(Date, primary_key=True) # UTC date of order_date
+    supplier_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    quantity = Column(BigInteger, nullable=False, default=0)
+    volume = Column(DECIMAL(16, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_order_daily_stats_supplier_product_day", "supplier_id", "product_id", "day"),
+        Index("ix_order_daily_stats_product_day", "product_id", "day"),
+    )
+
+class OrderWeeklyStats(Base):
+    __tablename__ = "order_weekly_stats"
+
+    # Same as order_daily_stats, one row per ISO week (keyed by its Monday)
+    week_start = Column(Date, primary_key=True)
+    supplier_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    quantity = Column(BigInteger, nullable=False, default=0)
+    volume = Column(DECIMAL(16, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_order_weekly_stats_supplier_product_week", "supplier_id", "product_id", "week_start"),
+        Index("ix_order_weekly_stats_product_week", "product_id", "week_start"),
+    )
+
+class ShipmentDailyStats(Base):
+    __tablename__ = "shipment_daily_stats"
+
+    # Shipments per shipment_date day and current status; a status change moves the count
+    day = Column(Date, primary_key=True)
+    status = Column(String(50), primary_key=True)
+    shipments = Column(Integer, nullable=False, default=0)
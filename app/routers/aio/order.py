@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Order
+from app.database import get_async_db
+from app.schemas import Orderout
+from app.services.pagination import paginate_async, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page_async, projected_response
+from datetime import datetime
+
+router = APIRouter(
+    prefix="/orders",
+    tags=["orders"],)
+
+@router.get("/", response_model=list[Orderout])
+async def read_orders(response: Response, status: str | None = None, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = select(Order)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Order.order_id], cursor, limit, response)
+
+@router.get("/date-range", response_model=list[Orderout])
+async def read_orders_by_date_range(start_date: datetime, end_date: datetime, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = select(Order).where(Order.order_date >= start_date, Order.order_date <= end_date)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Order, Orderout, fields, [Order.order_date, Order.order_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Order.order_date, Order.order_id], cursor, limit, response)
+
+@router.get("/product/{product_id}", response_model=list[Orderout])
+async def read_orders_by_product(product_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = select(Order).where(Order.product_id == product_id)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Order.order_id], cursor, limit, response)
+
+@router.get("/supplier/{supplier_id}", response_model=list[Orderout])
+async def read_orders_by_supplier(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = select(Order).where(Order.supplier_id == supplier_id)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Order.order_id], cursor, limit, response)
+
+@router.get("/{order_id}", response_model=Orderout)
+async def read_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order = await db.get(Order, order_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db_order
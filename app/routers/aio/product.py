@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Product, StockShard
+from app.database import get_async_db
+from app.schemas import Productout, Replenishmentout
+from app.services.pagination import paginate_async, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page_async, projected_response
+from app.services.cache import cached_json_async, page_headers, to_schema
+from app.services.replenishment_service import run_replenishment_plan, np
+from app.services.search_service import MAX_SEARCH_RESULTS, search_statement
+
+router = APIRouter(
+    prefix="/products",
+    tags=["products"])
+
+@router.get("/", response_model=list[Productout])
+async def read_products(request: Request, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if arrow:
+        # Arrow pages skip the JSON response cache
+        return projected_response(*await projected_page_async(db, select(Product), Product, Productout, fields, [Product.product_id], cursor, limit, arrow))
+    async def load():
+        if fields:
+            return await projected_page_async(db, select(Product), Product, Productout, fields, [Product.product_id], cursor, limit)
+        response = Response()
+        products = await paginate_async(db, select(Product), [Product.product_id], cursor, limit, response)
+        return [to_schema(Productout, p) for p in products], page_headers(response)
+    return await cached_json_async(request, ("products:list",), load)
+
+@router.get("/low-stock", response_model=list[Productout])
+async def read_low_stock_products(request: Request, threshold: int = 10, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if arrow:
+        stmt = select(Product).where(Product.quantity_available < threshold)
+        return projected_response(*await projected_page_async(db, stmt, Product, Productout, fields, [Product.product_id], cursor, limit, arrow))
+    async def load():
+        stmt = select(Product).where(Product.quantity_available < threshold)
+        if fields:
+            return await projected_page_async(db, stmt, Product, Productout, fields, [Product.product_id], cursor, limit)
+        response = Response()
+        products = await paginate_async(db, stmt, [Product.product_id], cursor, limit, response)
+        return [to_schema(Productout, p) for p in products], page_headers(response)
+    return await cached_json_async(request, ("products:list",), load)
+
+@router.get("/search", response_model=list[tuple[int, str, int]])
+async def search_products(q: str, request: Request, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        stmt = search_statement("products", q, max(1, min(limit, MAX_SEARCH_RESULTS)))
+        return ([tuple(row) for row in await db.execute(stmt)] if stmt is not None else []), {}
+    return await cached_json_async(request, ("products:list",), load)
+
+@router.get("/replenishment", response_model=list[Replenishmentout])
+async def read_replenishment(lead_time_days: float | None = None, cover_days: float | None = None, reorder_only: bool = False, limit: int = DEFAULT_PAGE_SIZE):
+    # The demand model is NumPy over a sync session; run it off the event loop
+    if np is None:
+        raise HTTPException(status_code=501, detail="Replenishment requires numpy (pip install numpy)")
+    try:
+        return await run_in_threadpool(run_replenishment_plan, lead_time_days, cover_days, reorder_only, max(1, min(limit, MAX_PAGE_SIZE)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{product_id}", response_model=Productout)
+async def read_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        db_product = await db.get(Product, product_id)
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        out = to_schema(Productout, db_product)
+        if db_product.stock_shards > 1:
+            # Live stock of a sharded product; the row holds the last compacted total
+            out.quantity_available = (await db.execute(
+                select(func.sum(StockShard.quantity)).where(StockShard.product_id == product_id)
+            )).scalar() or 0
+        return out, {}
+    return await cached_json_async(request, (f"product:{product_id}",), load)
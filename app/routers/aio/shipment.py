@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Shipment
+from app.database import get_async_db
+from app.schemas import Shipmentout
+from app.services.pagination import paginate_async, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page_async, projected_response
+from app.services.shipment_service import with_order_ids
+from app.services.delivery_service import LATE, ON_TIME
+
+router = APIRouter(
+    prefix="/shipments",
+    tags=["shipments"],
+)
+
+# order_ids is built from Shipment.orders, which can't lazy-load under asyncio
+shipments_with_orders = select(Shipment).options(with_order_ids)
+
+@router.get("/", response_model=list[Shipmentout])
+async def read_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, shipments_with_orders, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    return await paginate_async(db, shipments_with_orders, [Shipment.shipment_id], cursor, limit, response)
+
+@router.get("/delayed", response_model=list[Shipmentout])
+async def read_delayed_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = shipments_with_orders.where(Shipment.delivery_state == LATE)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Shipment.shipment_id], cursor, limit, response)
+
+@router.get("/on-time", response_model=list[Shipmentout])
+async def read_ontime_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = shipments_with_orders.where(Shipment.delivery_state == ON_TIME)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Shipment.shipment_id], cursor, limit, response)
+
+@router.get("/order/{order_id}", response_model=list[Shipmentout])
+async def read_shipments_by_order(order_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    stmt = shipments_with_orders.where(Shipment.order_id == order_id)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Shipment.shipment_id], cursor, limit, response)
+
+@router.get("/{shipment_id}", response_model=Shipmentout)
+async def read_shipment(shipment_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_shipment = await db.get(Shipment, shipment_id, options=[with_order_ids])
+    if db_shipment is None:
+        raise HTTPException(status_code=404, detail="Shipment not found")
+    return db_shipment
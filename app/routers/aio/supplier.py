@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Supplier, Order, Shipment, SupplierDeliveryStats
+from app.database import get_async_db
+from app.schemas import Supplierout, Orderout, Shipmentout, Supplierdeliverystats
+from app.services.pagination import paginate_async, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page_async, projected_response
+from app.services.shipment_service import with_order_ids
+from app.services.cache import cached_json_async, page_headers, to_schema
+from app.services.delivery_service import rollup_out
+from app.services.search_service import MAX_SEARCH_RESULTS, search_statement
+
+router = APIRouter(
+    prefix="/suppliers",
+    tags=["suppliers"],
+)
+
+@router.get("/", response_model=list[Supplierout])
+async def read_suppliers(request: Request, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if arrow:
+        # Arrow pages skip the JSON response cache
+        return projected_response(*await projected_page_async(db, select(Supplier), Supplier, Supplierout, fields, [Supplier.supplier_id], cursor, limit, arrow))
+    async def load():
+        if fields:
+            return await projected_page_async(db, select(Supplier), Supplier, Supplierout, fields, [Supplier.supplier_id], cursor, limit)
+        response = Response()
+        suppliers = await paginate_async(db, select(Supplier), [Supplier.supplier_id], cursor, limit, response)
+        return [to_schema(Supplierout, s) for s in suppliers], page_headers(response)
+    return await cached_json_async(request, ("suppliers:list",), load)
+
+@router.get("/search", response_model=list[tuple[int, str]])
+async def search_suppliers(q: str, request: Request, limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        stmt = search_statement("suppliers", q, max(1, min(limit, MAX_SEARCH_RESULTS)))
+        return ([tuple(row) for row in await db.execute(stmt)] if stmt is not None else []), {}
+    return await cached_json_async(request, ("suppliers:list",), load)
+
+@router.get("/delivery-stats", response_model=list[Supplierdeliverystats])
+async def read_delivery_stats(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, db: AsyncSession = Depends(get_async_db)):
+    rows = await paginate_async(db, select(SupplierDeliveryStats), [SupplierDeliveryStats.supplier_id], cursor, limit, response)
+    return [rollup_out(row) for row in rows]
+
+@router.get("/{supplier_id}", response_model=Supplierout)
+async def read_supplier(supplier_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        db_supplier = await db.get(Supplier, supplier_id)
+        if db_supplier is None:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        return to_schema(Supplierout, db_supplier), {}
+    return await cached_json_async(request, (f"supplier:{supplier_id}",), load)
+
+@router.get("/{supplier_id}/orders", response_model=list[Orderout])
+async def read_supplier_orders(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Supplier, supplier_id) is None:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    stmt = select(Order).where(Order.supplier_id == supplier_id)
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Order.order_id], cursor, limit, response)
+
+@router.get("/{supplier_id}/shipments", response_model=list[Shipmentout])
+async def read_supplier_shipments(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Supplier, supplier_id) is None:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    # order_ids is built from Shipment.orders, which can't lazy-load under asyncio
+    stmt = (
+        select(Shipment)
+        .join(Shipment.orders)
+        .where(Order.supplier_id == supplier_id)
+        .distinct()
+        .options(with_order_ids)
+    )
+    if fields or arrow:
+        return projected_response(*await projected_page_async(db, stmt, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    return await paginate_async(db, stmt, [Shipment.shipment_id], cursor, limit, response)
+
+@router.get("/{supplier_id}/delivery-stats", response_model=Supplierdeliverystats)
+async def read_supplier_delivery_stats(supplier_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = await db.get(SupplierDeliveryStats, supplier_id)
+    if row is None:
+        if await db.get(Supplier, supplier_id) is None:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        row = SupplierDeliveryStats(supplier_id=supplier_id, pending=0, on_time=0, late=0)
+    return rollup_out(row)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas import Orderstatspoint, Shipmentstatspoint
+from app.services.analytics_service import ORDER_TABLES, order_series, shipment_series
+from datetime import date
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+GROUP_BY = ("supplier", "product")
+
+
+def _check_range(granularity: str, start: date | None, end: date | None):
+    if granularity not in ORDER_TABLES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(ORDER_TABLES)}")
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+@router.get("/orders", response_model=list[Orderstatspoint])
+def read_order_trends(granularity: str = "day", start: date | None = None, end: date | None = None, supplier_id: int | None = None, product_id: int | None = None, group_by: str | None = None, db: Session = Depends(get_db)):
+    # Served from the order rollups; a period with no orders has no point
+    _check_range(granularity, start, end)
+    if group_by is not None and group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+    return order_series(db, granularity, start, end, supplier_id, product_id, group_by)
+
+@router.get("/shipments", response_model=list[Shipmentstatspoint])
+def read_shipment_trends(granularity: str = "day", start: date | None = None, end: date | None = None, status: str | None = None, db: Session = Depends(get_db)):
+    # Shipments by shipment_date and current status
+    _check_range(granularity, start, end)
+    return shipment_series(db, granularity, start, end, status)
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.models import Supplier, Product, Order, Shipment
+from app.database import SessionLocal
+from app.schemas import Changeout, Changepage, Supplierout, Productout, Orderout, Shipmentout
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.shipment_service import with_order_ids
+from app.services.cache import to_schema
+from app.services.changes import cursor_is_stale, head_seq, read_changes
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+)
+
+MAX_WAIT_SECONDS = 30
+POLL_SECONDS = 0.5
+KEEPALIVE_SECONDS = 15
+
+# entity -> (model, primary key column, output schema)
+ENTITIES = {
+    "supplier": (Supplier, Supplier.supplier_id, Supplierout),
+    "product": (Product, Product.product_id, Productout),
+    "order": (Order, Order.order_id, Orderout),
+    "shipment": (Shipment, Shipment.shipment_id, Shipmentout),
+}
+
+
+def _current_rows(db, changes) -> dict:
+    ids = {}
+    for change in changes:
+        ids.setdefault(change.entity, set()).add(change.entity_id)
+    rows = {}
+    for entity, entity_ids in ids.items():
+        model, pk, schema = ENTITIES[entity]
+        query = db.query(model).filter(pk.in_(entity_ids))
+        if model is Shipment:
+            query = query.options(with_order_ids)
+        for obj in query:
+            rows[(entity, getattr(obj, pk.key))] = jsonable_encoder(to_schema(schema, obj))
+    return rows
+
+
+def _fetch(since: int, limit: int, expand: bool) -> Changepage:
+    db = SessionLocal()
+    try:
+        if cursor_is_stale(db, since):
+            # Entries the client never saw were purged (or the log was reset); it has to resync from scratch
+            raise HTTPException(status_code=410, detail="Cursor is older than the change log retention; resync and start from the current cursor")
+        changes = read_changes(db, since, limit)
+        out = [to_schema(Changeout, c) for c in changes]
+        if expand and changes:
+            rows = _current_rows(db, changes)
+            for change in out:
+                change.data = rows.get((change.entity, change.entity_id))
+        return Changepage(changes=out, cursor=changes[-1].seq if changes else since, more=len(changes) == limit)
+    finally:
+        db.close()
+
+
+def _head() -> int:
+    db = SessionLocal()
+    try:
+        return head_seq(db)
+    finally:
+        db.close()
+
+
+@router.get("/", response_model=Changepage)
+async def read_changes_page(since: int | None = None, limit: int = DEFAULT_PAGE_SIZE, wait: float = 0, expand: bool = False):
+    """Changes after `since`, oldest first.
+
+    Without `since` this only returns the current cursor, for a client that has
+    just loaded a full snapshot. With `wait`, an empty page is held open for up
+    to that many seconds until something changes (long-poll).
+    """
+    if since is None:
+        return Changepage(changes=[], cursor=await run_in_threadpool(_head), more=False)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    deadline = time.monotonic() + max(0, min(wait, MAX_WAIT_SECONDS))
+    while True:
+        page = await run_in_threadpool(_fetch, since, limit, expand)
+        if page.changes or time.monotonic() >= deadline:
+            return page
+        await asyncio.sleep(POLL_SECONDS)
+
+
+@router.get("/stream")
+async def stream_changes(request: Request, since: int | None = None, expand: bool = False, last_event_id: str | None = Header(None)):
+    """Server-sent events: one `change` event per entry, with the seq as the event id.
+
+    Browsers reconnect with Last-Event-ID, which takes precedence over `since`.
+    """
+    if last_event_id is not None and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = await run_in_threadpool(_head)
+    # Raise 410 now, before the 200 and headers have gone out
+    page = await run_in_threadpool(_fetch, since, MAX_PAGE_SIZE, expand)
+
+    async def events():
+        nonlocal page
+        cursor = since
+        idle_since = time.monotonic()
+        yield f"retry: {int(POLL_SECONDS * 1000)}\n\n"
+        while not await request.is_disconnected():
+            for change in page.changes:
+                yield f"id: {change.seq}\nevent: change\ndata: {json.dumps(jsonable_encoder(change), separators=(',', ':'))}\n\n"
+            if page.changes:
+                cursor = page.cursor
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle_since = time.monotonic()
+            if not page.more:
+                await asyncio.sleep(POLL_SECONDS)
+            try:
+                page = await run_in_threadpool(_fetch, cursor, MAX_PAGE_SIZE, expand)
+            except HTTPException:
+                return # fell behind retention mid-stream; the reconnect gets the 410
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.services.export_service import EXPORT_ENTITIES, EXPORT_WRITERS, MEDIA_TYPES, export_statement, pa, unsupported_filters
+from datetime import datetime
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+)
+
+@router.get("/{entity}.{fmt}")
+def export_entity(entity: str, fmt: str, start_date: datetime | None = None, end_date: datetime | None = None, supplier_id: int | None = None):
+    model = EXPORT_ENTITIES.get(entity)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{entity}'")
+    if fmt not in EXPORT_WRITERS:
+        raise HTTPException(status_code=404, detail=f"Unsupported format '{fmt}', expected one of {', '.join(EXPORT_WRITERS)}")
+    unsupported = unsupported_filters(model, start_date=start_date, end_date=end_date, supplier_id=supplier_id)
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"The {entity} export cannot be filtered by {', '.join(unsupported)}")
+    if fmt in ("parquet", "arrow") and pa is None:
+        raise HTTPException(status_code=501, detail=f"{fmt.capitalize()} export requires pyarrow (pip install pyarrow)")
+
+    columns, stmt = export_statement(model, start_date, end_date, supplier_id)
+    return StreamingResponse(
+        EXPORT_WRITERS[fmt](columns, stmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{fmt}"'},
+    )
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from app.models import Order, Product, Shipment
+from app.models import Order, Shipment
 from app.database import get_db
-from app.schemas import Ordercreate, Orderout
-from app.services.order_service import check_stock_availabilty
+from app.schemas import Ordercreate, Orderout, Orderbulkresult
+from app.services.order_service import reserve_stock, release_stock, create_orders_bulk
+from app.services.shipment_service import top_up_waiting_shipments
+from app.services.inventory_service import record_movement
+from app.services.analytics_service import bump_order_stats
+import json
+from app.services.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page, projected_response
+from app.services.cache import invalidate_products
+from app.services.idempotency import idempotent
 from datetime import datetime
 
 router = APIRouter(
@@ -11,15 +21,16 @@ router = APIRouter(
     tags=["orders"],)
 
 @router.post("/", response_model=Orderout)
-def create_order(order: Ordercreate, db: Session = Depends(get_db)):
-    if not check_stock_availabilty(order.product_id, order.quantity_ordered, db):
+def create_order(order: Ordercreate, db: Session = Depends(get_db), idempotency_key: str | None = Header(None)):
+    # A retry with the same Idempotency-Key gets the first response instead of reserving stock again
+    return idempotent("POST /orders/", idempotency_key, order, Orderout, lambda: _create_order(order, db))
+
+def _create_order(order: Ordercreate, db: Session):
+    # Checks, decrements and reads volume_per_unit in one statement where the dialect allows
+    vol_per_unit = reserve_stock(order.product_id, order.quantity_ordered, db)
+    if vol_per_unit is None:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Insufficient stock available")
-    
-    product = db.query(Product).filter(Product.product_id == order.product_id).first()
-    product.quantity_available -= order.quantity_ordered
-    
-    # Calculate volume
-    vol_per_unit = float(product.volume_per_unit) if product.volume_per_unit else 1.0
     tot_vol = vol_per_unit * order.quantity_ordered
 
     db_order = Order(
@@ -30,29 +41,90 @@ def create_order(order: Ordercreate, db: Session = Depends(get_db)):
         total_volume=tot_vol,
         status="Pending"
     )
+    # Joins the supplier's Waiting shipment if one is open
+    top_up_waiting_shipments(db, [db_order])
     db.add(db_order)
+    db.flush()
+    record_movement(db, order.product_id, -order.quantity_ordered, "order", db_order.order_id)
+    bump_order_stats(db, [db_order])
     db.commit()
     db.refresh(db_order)
+    invalidate_products(order.product_id)
     return db_order
 
+MAX_BULK_ORDERS = 10000
+
+@router.post("/bulk", response_model=list[Orderbulkresult])
+async def create_orders_bulk_endpoint(request: Request, db: Session = Depends(get_db)):
+    # Accepts a JSON array or an NDJSON stream (one order object per line)
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(items) > MAX_BULK_ORDERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ORDERS} orders per batch")
+
+    valid = []
+    invalid = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            invalid[index] = {"index": index, "status": "rejected", "detail": "item must be an object"}
+            continue
+        try:
+            valid.append((index, Ordercreate(**item)))
+        except ValidationError as e:
+            invalid[index] = {"index": index, "status": "rejected", "detail": e.errors()}
+
+    try:
+        created = await run_in_threadpool(create_orders_bulk, [o for _, o in valid], db)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    invalidate_products(*{o.product_id for _, o in valid})
+
+    results = dict(invalid)
+    for (index, _), result in zip(valid, created):
+        results[index] = dict(result, index=index)
+    return [results[i] for i in range(len(items))]
+
 @router.get("/", response_model=list[Orderout])
-def read_orders(db: Session = Depends(get_db)):
-    order = db.query(Order).all()
+def read_orders(response: Response, status: str | None = None, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Order)
+    if status:
+        query = query.filter(Order.status == status)
+    if fields or arrow:
+        # ?fields=order_id,status,... reads and encodes just those columns, without ORM objects or Orderout
+        return projected_response(*projected_page(query, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    order = paginate(query, [Order.order_id], cursor, limit, response)
     return order
 
 @router.get("/date-range", response_model=list[Orderout])
-def read_orders_by_date_range(start_date: datetime, end_date: datetime, db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.order_date >= start_date, Order.order_date <= end_date).all()
+def read_orders_by_date_range(start_date: datetime, end_date: datetime, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Order).filter(Order.order_date >= start_date, Order.order_date <= end_date)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Order, Orderout, fields, [Order.order_date, Order.order_id], cursor, limit, arrow))
+    orders = paginate(query, [Order.order_date, Order.order_id], cursor, limit, response)
     return orders
 
 @router.get("/product/{product_id}", response_model=list[Orderout])
-def read_orders_by_product(product_id: int, db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.product_id == product_id).all()
+def read_orders_by_product(product_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Order).filter(Order.product_id == product_id)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    orders = paginate(query, [Order.order_id], cursor, limit, response)
     return orders
 
 @router.get("/supplier/{supplier_id}", response_model=list[Orderout])
-def read_orders_by_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    orders = db.query(Order).filter(Order.supplier_id == supplier_id).all()
+def read_orders_by_supplier(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Order).filter(Order.supplier_id == supplier_id)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    orders = paginate(query, [Order.order_id], cursor, limit, response)
     return orders
 
 @router.get("/{order_id}", response_model=Orderout)
@@ -68,14 +140,24 @@ def delete_order(order_id: int, db: Session = Depends(get_db)):
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    shipment = db.query(Shipment).filter(Shipment.order_id == order_id).first()
+    # The shipment carrying this order (or, for older rows, the one that names it as its primary order)
+    shipment_filter = Shipment.shipment_id == db_order.shipment_id if db_order.shipment_id else Shipment.order_id == order_id
+    shipment = db.query(Shipment).filter(shipment_filter).with_for_update().first()
     if shipment and shipment.status == "Delivered":
         raise HTTPException(status_code=400, detail="Cannot cancel order that has been delivered")
+    if shipment and db_order.shipment_id == shipment.shipment_id:
+        # Take the order's volume back off the load that top-ups and consolidation added it to
+        capacity = float(shipment.required_capacity or 0)
+        load = max(float(shipment.current_load or 0) - float(db_order.total_volume or 0), 0.0)
+        shipment.current_load = load
+        shipment.load_percentage = min(load / capacity * 100, 999.99) if capacity > 0 else 100
     
-    product = db.query(Product).filter(Product.product_id == db_order.product_id).first()
-    if product:
-        product.quantity_available += db_order.quantity_ordered
+    product_id = db_order.product_id
+    release_stock(product_id, db_order.quantity_ordered, db)
+    record_movement(db, product_id, db_order.quantity_ordered, "order_cancelled", order_id)
+    bump_order_stats(db, [db_order], sign=-1)
     
     db.delete(db_order)
     db.commit()
+    invalidate_products(product_id)
     return {"detail": "Order cancelled and stock restored successfully"}
\ No newline at end of file
@@ -1,13 +1,26 @@
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
-from app.models import Product
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import Product, StockMovement, StockShard
 from app.database import get_db
-from app.schemas import Productcreate, Productupdate, Productout
+from app.schemas import Productcreate, Productupdate, Productout, Stockmovementout, Replenishmentout
+from app.services.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page, projected_response
+from app.services.replenishment_service import replenishment_plan, np
+from app.services.search_service import MAX_SEARCH_RESULTS, search_statement
+from app.services.inventory_service import MAX_STOCK_SHARDS, record_movement, stock_levels, take_stock, put_stock, set_stock, reshard_stock
+from app.services.cache import cached_json, page_headers, to_schema, invalidate_products
 
 router = APIRouter(
     prefix="/products",
     tags=["products"])
 
+def product_out(db: Session, db_product: Product) -> Productout:
+    # List reads use the compacted product row; single reads add up a sharded product's live stock
+    out = to_schema(Productout, db_product)
+    if db_product.stock_shards > 1:
+        out.quantity_available = stock_levels(db, [db_product.product_id])[db_product.product_id]
+    return out
+
 @router.post("/", response_model=Productout)
 def create_product(product: Productcreate, db: Session = Depends(get_db)):
     db_product = Product(
@@ -18,26 +31,66 @@ def create_product(product: Productcreate, db: Session = Depends(get_db)):
         volume_per_unit=product.volume_per_unit or 1.0,
     )
     db.add(db_product)
+    db.flush()
+    record_movement(db, db_product.product_id, db_product.quantity_available, "initial")
     db.commit()
     db.refresh(db_product)
+    invalidate_products(db_product.product_id)
     return db_product
 
 @router.get("/", response_model=list[Productout])
-def read_products(db: Session = Depends(get_db)):
-    products = db.query(Product).all()
-    return products
+def read_products(request: Request, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    if arrow:
+        # Arrow pages skip the JSON response cache
+        return projected_response(*projected_page(db.query(Product), Product, Productout, fields, [Product.product_id], cursor, limit, arrow))
+    def load():
+        if fields:
+            return projected_page(db.query(Product), Product, Productout, fields, [Product.product_id], cursor, limit)
+        response = Response()
+        products = paginate(db.query(Product), [Product.product_id], cursor, limit, response)
+        return [to_schema(Productout, p) for p in products], page_headers(response)
+    return cached_json(request, ("products:list",), load)
 
 @router.get("/low-stock", response_model=list[Productout])
-def read_low_stock_products(threshold: int = 10, db: Session = Depends(get_db)):
-    products = db.query(Product).filter(Product.quantity_available < threshold).all()
-    return products
+def read_low_stock_products(request: Request, threshold: int = 10, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    if arrow:
+        query = db.query(Product).filter(Product.quantity_available < threshold)
+        return projected_response(*projected_page(query, Product, Productout, fields, [Product.product_id], cursor, limit, arrow))
+    def load():
+        query = db.query(Product).filter(Product.quantity_available < threshold)
+        if fields:
+            return projected_page(query, Product, Productout, fields, [Product.product_id], cursor, limit)
+        response = Response()
+        products = paginate(query, [Product.product_id], cursor, limit, response)
+        return [to_schema(Productout, p) for p in products], page_headers(response)
+    return cached_json(request, ("products:list",), load)
+
+@router.get("/search", response_model=list[tuple[int, str, int]])
+def search_products(q: str, request: Request, limit: int = 20, db: Session = Depends(get_db)):
+    # Typeahead: [product_id, name, quantity_available] for products whose name/description words start with q
+    def load():
+        stmt = search_statement("products", q, max(1, min(limit, MAX_SEARCH_RESULTS)))
+        return ([tuple(row) for row in db.execute(stmt)] if stmt is not None else []), {}
+    return cached_json(request, ("products:list",), load)
+
+@router.get("/replenishment", response_model=list[Replenishmentout])
+def read_replenishment(lead_time_days: float | None = None, cover_days: float | None = None, reorder_only: bool = False, limit: int = DEFAULT_PAGE_SIZE, db: Session = Depends(get_db)):
+    # Per-product demand and days of cover, fewest days of cover first; replaces a single low-stock threshold
+    if np is None:
+        raise HTTPException(status_code=501, detail="Replenishment requires numpy (pip install numpy)")
+    try:
+        return replenishment_plan(db, lead_time_days, cover_days, reorder_only, max(1, min(limit, MAX_PAGE_SIZE)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{product_id}", response_model=Productout)
-def read_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = db.query(Product).filter(Product.product_id == product_id).first()
-    if db_product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+def read_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        db_product = db.query(Product).filter(Product.product_id == product_id).first()
+        if db_product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return product_out(db, db_product), {}
+    return cached_json(request, (f"product:{product_id}",), load)
 
 @router.put("/{product_id}", response_model=Productout)
 def update_product(product_id: int, product: Productupdate, db: Session = Depends(get_db)):
@@ -45,33 +98,64 @@ def update_product(product_id: int, product: Productupdate, db: Session = Depend
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    if product.quantity_available is not None:
+        # A stock count correction; goes through the ledger and any shards
+        delta = set_stock(db, db_product, product.quantity_available)
+        record_movement(db, product_id, delta, "correction")
     for var, value in vars(product).items():
-        if value is not None:
+        if value is not None and var != "quantity_available":
             setattr(db_product, var, value)
     
     db.commit()
     db.refresh(db_product)
+    invalidate_products(product_id)
     return db_product
 
 @router.put("/{product_id}/adjust-stock", response_model=Productout)
 def adjust_product_stock(product_id: int, amount: int, db: Session = Depends(get_db)):
+    # Conditional UPDATE (or shard take): concurrent adjustments can't drive stock below zero
+    if amount < 0:
+        adjusted = take_stock(db, product_id, -amount)
+    else:
+        adjusted = put_stock(db, product_id, amount)
+    if not adjusted:
+        db.rollback()
+        if db.query(Product.product_id).filter(Product.product_id == product_id).first() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(status_code=400, detail="Stock cannot be negative")
+    record_movement(db, product_id, amount, "adjustment")
+    db.commit()
+    invalidate_products(product_id)
+    db_product = db.query(Product).filter(Product.product_id == product_id).first()
+    return product_out(db, db_product)
+
+@router.put("/{product_id}/stock-shards", response_model=Productout)
+def update_stock_shards(product_id: int, count: int, db: Session = Depends(get_db)):
+    # Hot products: spread stock over `count` rows so concurrent orders don't queue on one row lock
+    if not 1 <= count <= MAX_STOCK_SHARDS:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_STOCK_SHARDS}")
     db_product = db.query(Product).filter(Product.product_id == product_id).first()
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    db_product.quantity_available += amount
-    if db_product.quantity_available < 0:
-        raise HTTPException(status_code=400, detail="Stock cannot be negative")
-        
+    reshard_stock(db, db_product, count)
     db.commit()
     db.refresh(db_product)
+    invalidate_products(product_id)
     return db_product
 
+@router.get("/{product_id}/stock-movements", response_model=list[Stockmovementout])
+def read_stock_movements(product_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, db: Session = Depends(get_db)):
+    # Oldest first; movements past STOCK_LEDGER_RETENTION_DAYS are folded into stock_snapshots
+    query = db.query(StockMovement).filter(StockMovement.product_id == product_id)
+    return paginate(query, [StockMovement.movement_id], cursor, limit, response)
+
 @router.delete("/{product_id}")
 def delete_product(product_id: int,db: Session = Depends(get_db)):
     db_product = db.query(Product).filter(Product.product_id == product_id).first()
     if db_product is None:
         raise HTTPException(status_code=404,detail="product not found")
     db.delete(db_product)
+    db.query(StockShard).filter(StockShard.product_id == product_id).delete(synchronize_session=False)
     db.commit()
+    invalidate_products(product_id)
     return {"detail":"deleted product successful"}
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from app.services.export_service import EXPORT_ENTITIES, unsupported_filters
+from app.services.report_service import FPDF, dataset_version, artifact_path, build_report
+from datetime import datetime
+import os
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["reports"],
+)
+
+@router.get("/{entity}.pdf")
+async def read_report(entity: str, start_date: datetime | None = None, end_date: datetime | None = None, supplier_id: int | None = None, if_none_match: str | None = Header(None)):
+    """PDF table of `entity` (same filters as /exports), at most MAX_REPORT_ROWS rows.
+
+    Rendered in a worker process and kept on disk per filter set and dataset
+    version, so repeated downloads of unchanged data are served from the file.
+    """
+    if entity not in EXPORT_ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown report '{entity}'")
+    if FPDF is None:
+        raise HTTPException(status_code=501, detail="PDF reports require fpdf (pip install fpdf)")
+
+    filters = {"start_date": start_date, "end_date": end_date, "supplier_id": supplier_id}
+    unsupported = unsupported_filters(EXPORT_ENTITIES[entity], **filters)
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"The {entity} report cannot be filtered by {', '.join(unsupported)}")
+    path = artifact_path(entity, filters, await run_in_threadpool(dataset_version, entity))
+    etag = f'"{os.path.basename(path)[:-4]}"'
+    if if_none_match == etag and os.path.exists(path):
+        return Response(status_code=304, headers={"ETag": etag})
+    cached = await build_report(entity, filters, path)
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"{entity}_report.pdf",
+        headers={"ETag": etag, "X-Report-Cache": "hit" if cached else "miss"},
+    )
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.models import Shipment, Order, Supplier
 from app.database import get_db
-from app.schemas import Shipmentcreate, Shipmentout, Shipmentupdate
+from app.schemas import Shipmentcreate, Shipmentout, Shipmentupdate, Shipmentautoconsolidate, Consolidatedshipment
+from app.services.shipment_service import auto_consolidate, with_order_ids
+from app.services.delivery_service import bump_rollup, refresh_delivery_state, shipment_supplier_id, LATE, ON_TIME
+from app.services.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page, projected_response
+from app.services.idempotency import idempotent
+from app.services.analytics_service import bump_shipment_stats, move_shipment_stats
 from datetime import datetime
 
 router = APIRouter(
@@ -11,7 +17,11 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=Shipmentout)
-def create_shipment(shipment: Shipmentcreate, db: Session = Depends(get_db)):
+def create_shipment(shipment: Shipmentcreate, db: Session = Depends(get_db), idempotency_key: str | None = Header(None)):
+    # A retry with the same Idempotency-Key gets the first response instead of a duplicate shipment
+    return idempotent("POST /shipments/", idempotency_key, shipment, Shipmentout, lambda: _create_shipment(shipment, db))
+
+def _create_shipment(shipment: Shipmentcreate, db: Session):
     # 1. Gather Orders
     target_orders = []
     if shipment.order_ids:
@@ -28,6 +38,11 @@ def create_shipment(shipment: Shipmentcreate, db: Session = Depends(get_db)):
     if any(o.supplier_id != supplier_id for o in target_orders):
         raise HTTPException(status_code=400, detail="All orders must be from the same supplier")
 
+    # An order topped up onto a Waiting shipment already counts in that shipment's load
+    assigned = [o.order_id for o in target_orders if o.shipment_id is not None]
+    if assigned:
+        raise HTTPException(status_code=409, detail=f"Orders already on a shipment: {', '.join(map(str, assigned))}")
+
     supplier = db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
     min_cap = float(supplier.min_capacity) if supplier.min_capacity else 0.0
 
@@ -68,7 +83,10 @@ def create_shipment(shipment: Shipmentcreate, db: Session = Depends(get_db)):
         cost_reason=cost_reason,
         actual_arrival_date=shipment.actual_arrival_date
     )
+    refresh_delivery_state(db, db_shipment, supplier_id=supplier_id)
     db.add(db_shipment)
+    db.flush() # fills in the default shipment_date
+    bump_shipment_stats(db, [(db_shipment.shipment_date, final_status, 1)])
     db.commit()
     db.refresh(db_shipment)
 
@@ -81,33 +99,51 @@ def create_shipment(shipment: Shipmentcreate, db: Session = Depends(get_db)):
 
     return db_shipment
 
+@router.post("/auto-consolidate", response_model=list[Consolidatedshipment])
+def auto_consolidate_shipments(request: Shipmentautoconsolidate, db: Session = Depends(get_db)):
+    try:
+        return auto_consolidate(
+            db,
+            shipment_date=request.shipment_date or datetime.utcnow(),
+            estimated_arrival_date=request.estimated_arrival_date,
+            supplier_id=request.supplier_id,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.get("/", response_model=list[Shipmentout])
-def read_shipments(db: Session = Depends(get_db)):
-    shipments = db.query(Shipment).all()
+def read_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Shipment).options(with_order_ids)
+    if fields or arrow:
+        # Column fields only; order_ids needs the orders table
+        return projected_response(*projected_page(query, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    shipments = paginate(query, [Shipment.shipment_id], cursor, limit, response)
     return shipments
 
 @router.get("/delayed", response_model=list[Shipmentout])
-def read_delayed_shipments(db: Session = Depends(get_db)):
-    now = datetime.utcnow()
-    from sqlalchemy import or_
-    shipments = db.query(Shipment).filter(
-        or_(
-            Shipment.actual_arrival_date > Shipment.estimated_arrival_date,
-            (Shipment.actual_arrival_date == None) & (now > Shipment.estimated_arrival_date)
-        )
-    ).all()
+def read_delayed_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    # delivery_state is kept current on write and by the overdue sweep, so this
+    # walks the (delivery_state, shipment_id) index instead of comparing dates per row
+    query = db.query(Shipment).options(with_order_ids).filter(Shipment.delivery_state == LATE)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    shipments = paginate(query, [Shipment.shipment_id], cursor, limit, response)
     return shipments
 
 @router.get("/on-time", response_model=list[Shipmentout])
-def read_ontime_shipments(db: Session = Depends(get_db)):
-    shipments = db.query(Shipment).filter(
-        Shipment.actual_arrival_date <= Shipment.estimated_arrival_date
-    ).all()
+def read_ontime_shipments(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Shipment).options(with_order_ids).filter(Shipment.delivery_state == ON_TIME)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    shipments = paginate(query, [Shipment.shipment_id], cursor, limit, response)
     return shipments
 
 @router.get("/order/{order_id}", response_model=list[Shipmentout])
-def read_shipments_by_order(order_id: int, db: Session = Depends(get_db)):
-    shipments = db.query(Shipment).filter(Shipment.order_id == order_id).all()
+def read_shipments_by_order(order_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    query = db.query(Shipment).options(with_order_ids).filter(Shipment.order_id == order_id)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    shipments = paginate(query, [Shipment.shipment_id], cursor, limit, response)
     return shipments
 
 @router.get("/{shipment_id}", response_model=Shipmentout)
@@ -119,22 +155,32 @@ def read_shipment(shipment_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{shipment_id}", response_model=Shipmentout)
 def update_shipment(shipment_id: int, shipment: Shipmentupdate, db: Session = Depends(get_db)):
-    db_shipment = db.query(Shipment).filter(Shipment.shipment_id == shipment_id).first()
+    db_shipment = db.query(Shipment).filter(Shipment.shipment_id == shipment_id).with_for_update().first()
     if db_shipment is None:
         raise HTTPException(status_code=404, detail="Shipment not found")
+    old_supplier_id = shipment_supplier_id(db, db_shipment)
+    before = (db_shipment.shipment_date, db_shipment.status)
     for key, value in shipment.dict(exclude_unset=True).items():
         setattr(db_shipment, key, value)
+    # Resolved from the (possibly new) primary order; a changed supplier takes the rollup count with it
+    supplier_id = shipment_supplier_id(db, db_shipment)
+    if supplier_id != old_supplier_id and db_shipment.delivery_state:
+        bump_rollup(db, old_supplier_id, {db_shipment.delivery_state: -1})
+        bump_rollup(db, supplier_id, {db_shipment.delivery_state: 1})
+    refresh_delivery_state(db, db_shipment, supplier_id=supplier_id)
+    move_shipment_stats(db, before, (db_shipment.shipment_date, db_shipment.status))
     db.commit()
     db.refresh(db_shipment)
     return db_shipment
 
 @router.put("/{shipment_id}/arrival", response_model=Shipmentout)
 def update_arrival_date(shipment_id: int, actual_arrival_date: datetime, db: Session = Depends(get_db)):
-    db_shipment = db.query(Shipment).filter(Shipment.shipment_id == shipment_id).first()
+    db_shipment = db.query(Shipment).filter(Shipment.shipment_id == shipment_id).with_for_update().first()
     if db_shipment is None:
         raise HTTPException(status_code=404, detail="Shipment not found")
     
     db_shipment.actual_arrival_date = actual_arrival_date
+    refresh_delivery_state(db, db_shipment)
     db.commit()
     db.refresh(db_shipment)
     return db_shipment
\ No newline at end of file
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Order, Shipment
+from app.database import get_db
+from app.schemas import Statssummary
+from app.services.shipment_service import with_order_ids
+from app.services.stats_service import current_totals
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+@router.get("/summary", response_model=Statssummary)
+def read_summary(latest: int = 5, db: Session = Depends(get_db)):
+    latest = max(1, min(latest, 50))
+
+    # Counts and stock value come from the background snapshot (see stats_service);
+    # the open backlog is filtered by status, so only pending/waiting rows are summed
+    totals = current_totals(db)
+    pending_volume = db.query(func.coalesce(func.sum(Order.total_volume), 0)).filter(Order.status == "Pending").scalar()
+    waiting_shipments = db.query(func.count(Shipment.shipment_id)).filter(Shipment.status == "Waiting").scalar()
+
+    latest_orders = db.query(Order).order_by(Order.order_id.desc()).limit(latest).all()
+    open_shipments = (
+        db.query(Shipment)
+        .options(with_order_ids)
+        .filter(Shipment.status != "Delivered")
+        .order_by(Shipment.shipment_id.desc())
+        .limit(latest)
+        .all()
+    )
+
+    return {
+        **totals,
+        "pending_volume": float(pending_volume),
+        "waiting_shipments": waiting_shipments,
+        "latest_orders": latest_orders,
+        "open_shipments": open_shipments,
+    }
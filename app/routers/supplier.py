@@ -1,8 +1,14 @@
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
-from app.models import Supplier, Order, Shipment
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.models import Supplier, Order, Shipment, SupplierDeliveryStats
 from app.database import get_db
-from app.schemas import Suppliercreate, Supplierupdate, Supplierout, Orderout, Shipmentout
+from app.schemas import Suppliercreate, Supplierupdate, Supplierout, Orderout, Shipmentout, Supplierdeliverystats
+from app.services.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.services.projection import accepts_arrow, projected_page, projected_response
+from app.services.shipment_service import with_order_ids
+from app.services.cache import cached_json, page_headers, to_schema, invalidate_suppliers
+from app.services.delivery_service import rollup_out
+from app.services.search_service import MAX_SEARCH_RESULTS, search_statement
 
 router = APIRouter(
     prefix="/suppliers",
@@ -19,21 +25,49 @@ def create_supplier(supplier: Suppliercreate, db: Session = Depends(get_db)):
         min_capacity=supplier.min_capacity or 50.0,
     )
     db.add(db_supplier)
+    db.flush()
+    # Rollup row up front, so shipment writes only ever UPDATE it
+    db.add(SupplierDeliveryStats(supplier_id=db_supplier.supplier_id))
     db.commit()
     db.refresh(db_supplier)
+    invalidate_suppliers(db_supplier.supplier_id)
     return db_supplier
 
 @router.get("/", response_model=list[Supplierout])
-def read_suppliers(db: Session = Depends(get_db)):
-    suppliers = db.query(Supplier).all()
-    return suppliers
+def read_suppliers(request: Request, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
+    if arrow:
+        # Arrow pages skip the JSON response cache
+        return projected_response(*projected_page(db.query(Supplier), Supplier, Supplierout, fields, [Supplier.supplier_id], cursor, limit, arrow))
+    def load():
+        if fields:
+            return projected_page(db.query(Supplier), Supplier, Supplierout, fields, [Supplier.supplier_id], cursor, limit)
+        response = Response()
+        suppliers = paginate(db.query(Supplier), [Supplier.supplier_id], cursor, limit, response)
+        return [to_schema(Supplierout, s) for s in suppliers], page_headers(response)
+    return cached_json(request, ("suppliers:list",), load)
+
+@router.get("/search", response_model=list[tuple[int, str]])
+def search_suppliers(q: str, request: Request, limit: int = 20, db: Session = Depends(get_db)):
+    # Typeahead: [supplier_id, name] for suppliers whose name/contact/address words start with q
+    def load():
+        stmt = search_statement("suppliers", q, max(1, min(limit, MAX_SEARCH_RESULTS)))
+        return ([tuple(row) for row in db.execute(stmt)] if stmt is not None else []), {}
+    return cached_json(request, ("suppliers:list",), load)
+
+@router.get("/delivery-stats", response_model=list[Supplierdeliverystats])
+def read_delivery_stats(response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, db: Session = Depends(get_db)):
+    # On-time / late counts per supplier, read from the rollup table
+    rows = paginate(db.query(SupplierDeliveryStats), [SupplierDeliveryStats.supplier_id], cursor, limit, response)
+    return [rollup_out(row) for row in rows]
 
 @router.get("/{supplier_id}", response_model=Supplierout)
-def read_supplier(supplier_id: int, db: Session = Depends(get_db)):
-    db_supplier = db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
-    if db_supplier is None:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-    return db_supplier
+def read_supplier(supplier_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        db_supplier = db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
+        if db_supplier is None:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        return to_schema(Supplierout, db_supplier), {}
+    return cached_json(request, (f"supplier:{supplier_id}",), load)
 
 @router.put("/{supplier_id}", response_model=Supplierout)
 def update_supplier(supplier_id: int, supplier: Supplierupdate, db: Session = Depends(get_db)):
@@ -47,6 +81,7 @@ def update_supplier(supplier_id: int, supplier: Supplierupdate, db: Session = De
     
     db.commit()
     db.refresh(db_supplier)
+    invalidate_suppliers(supplier_id)
     return db_supplier
 
 @router.delete("/{supplier_id}")
@@ -56,22 +91,40 @@ def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Supplier not found")
     
     db.delete(db_supplier)
+    # The rollup has no foreign key; drop it so a reused id (SQLite) starts from zero
+    db.query(SupplierDeliveryStats).filter(SupplierDeliveryStats.supplier_id == supplier_id).delete(synchronize_session=False)
     db.commit()
+    invalidate_suppliers(supplier_id)
     return {"detail": "Supplier deleted successfully"}
 
 @router.get("/{supplier_id}/orders", response_model=list[Orderout])
-def read_supplier_orders(supplier_id: int, db: Session = Depends(get_db)):
+def read_supplier_orders(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
     supplier = db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
-    orders = db.query(Order).filter(Order.supplier_id == supplier_id).all()
+    query = db.query(Order).filter(Order.supplier_id == supplier_id)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Order, Orderout, fields, [Order.order_id], cursor, limit, arrow))
+    orders = paginate(query, [Order.order_id], cursor, limit, response)
     return orders
 
 @router.get("/{supplier_id}/shipments", response_model=list[Shipmentout])
-def read_supplier_shipments(supplier_id: int, db: Session = Depends(get_db)):
+def read_supplier_shipments(supplier_id: int, response: Response, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, fields: str | None = None, arrow: bool = Depends(accepts_arrow), db: Session = Depends(get_db)):
     supplier = db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
-    shipments = db.query(Shipment).join(Order).filter(Order.supplier_id == supplier_id).all()
+    query = db.query(Shipment).join(Shipment.orders).filter(Order.supplier_id == supplier_id).distinct().options(with_order_ids)
+    if fields or arrow:
+        return projected_response(*projected_page(query, Shipment, Shipmentout, fields, [Shipment.shipment_id], cursor, limit, arrow))
+    shipments = paginate(query, [Shipment.shipment_id], cursor, limit, response)
     return shipments
+
+@router.get("/{supplier_id}/delivery-stats", response_model=Supplierdeliverystats)
+def read_supplier_delivery_stats(supplier_id: int, db: Session = Depends(get_db)):
+    row = db.query(SupplierDeliveryStats).filter(SupplierDeliveryStats.supplier_id == supplier_id).first()
+    if row is None:
+        if db.query(Supplier.supplier_id).filter(Supplier.supplier_id == supplier_id).first() is None:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        row = SupplierDeliveryStats(supplier_id=supplier_id, pending=0, on_time=0, late=0)
+    return rollup_out(row)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
 from typing import Optional
 
 class Suppliercreate(BaseModel):
@@ -20,7 +20,13 @@ class Ordercreate(BaseModel):
     product_id: int
     supplier_id: int
     order_date: datetime | None = None
-    quantity_ordered: int
+    quantity_ordered: int = Field(gt=0)
+
+class Orderbulkresult(BaseModel):
+    index: int
+    status: str # created / rejected
+    order_id: int | None = None
+    detail: str | list[dict] | None = None # pydantic errors for an invalid item
 
 class Shipmentcreate(BaseModel):
     order_id: int | None = None # Made optional
@@ -31,6 +37,18 @@ class Shipmentcreate(BaseModel):
     priority: str = "normal" # normal / urgent
     actual_arrival_date: Optional[datetime] | None = None
 
+class Shipmentautoconsolidate(BaseModel):
+    shipment_date: datetime | None = None
+    estimated_arrival_date: datetime
+    supplier_id: int | None = None # Limit the run to one supplier
+
+class Consolidatedshipment(BaseModel):
+    shipment_id: int
+    supplier_id: int
+    order_ids: list[int]
+    current_load: float
+    load_percentage: float
+
 class Supplierupdate(BaseModel):
     name: str | None = None
     address: str | None = None
@@ -53,11 +71,13 @@ class Productupdate(BaseModel):
 
 class Productout(Productcreate):
     product_id: int
+    stock_shards: int = 1
     class Config:
         orm_mode = True
 
 
 class Orderout(Ordercreate):
+    quantity_ordered: int # stored rows are returned as they are; Field(gt=0) only guards input
     order_id: int
     total_volume: float | None = 0.0
     status: str | None = None
@@ -85,3 +105,71 @@ class Shipmentupdate(BaseModel):
     actual_arrival_date: Optional[datetime] | None = None
     priority: Optional[str] | None = None
 
+class Stockmovementout(BaseModel):
+    movement_id: int
+    product_id: int
+    delta: int
+    reason: str
+    order_id: int | None = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class Supplierdeliverystats(BaseModel):
+    supplier_id: int
+    pending: int
+    on_time: int
+    late: int
+    on_time_rate: float | None = None # on_time / (on_time + late)
+
+class Statssummary(BaseModel):
+    products: int
+    orders: int
+    shipments: int
+    suppliers: int
+    stock_value: float
+    pending_volume: float
+    waiting_shipments: int
+    latest_orders: list[Orderout]
+    open_shipments: list[Shipmentout]
+
+class Changeout(BaseModel):
+    seq: int
+    entity: str # supplier / product / order / shipment
+    entity_id: int
+    op: str # insert / update / delete
+    changed_at: datetime
+    data: dict | None = None # current row with expand=true; None once deleted
+
+    class Config:
+        orm_mode = True
+
+class Changepage(BaseModel):
+    changes: list[Changeout]
+    cursor: int # pass back as ?since= for the next page
+    more: bool # another page is already available
+
+class Orderstatspoint(BaseModel):
+    period: date # the day, or the Monday of the week
+    supplier_id: int | None = None
+    product_id: int | None = None
+    orders: int
+    quantity: int
+    volume: float
+
+class Shipmentstatspoint(BaseModel):
+    period: date
+    status: str
+    shipments: int
+
+class Replenishmentout(BaseModel):
+    product_id: int
+    name: str
+    quantity_available: int
+    avg_daily_demand: float # units per day over the trailing window
+    demand_std: float
+    days_of_cover: float | None = None # None when there is no recent demand
+    reorder_point: int
+    suggested_order_quantity: int
+    needs_reorder: bool
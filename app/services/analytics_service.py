@@ -0,0 +1,188 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Order, Shipment, OrderDailyStats, OrderWeeklyStats, ShipmentDailyStats
+from app.services.upsert import upsert_add
+
+# Trend queries read these rollups instead of the orders/shipment tables:
+#   order_daily_stats / order_weekly_stats -> orders, quantity, volume per (period, supplier, product)
+#   shipment_daily_stats                  -> shipments per (day, status); weeks are summed at read time
+# Every write that adds, removes or re-dates an order or changes a shipment's status
+# bumps them in its own transaction, so a chart over years reads a few hundred rows.
+# Supplier totals are summed over the product rows at read time: a shared per-supplier
+# total row would be updated by every order and serialize the supplier's order writes.
+
+ORDER_COLUMNS = ("orders", "quantity", "volume")
+ORDER_TABLES = {
+    "day": (OrderDailyStats, OrderDailyStats.day),
+    "week": (OrderWeeklyStats, OrderWeeklyStats.week_start),
+}
+
+
+def _day(value) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10]) # SQLite DATE() returns text
+    if isinstance(value, datetime):
+        return value.date() # the wall-clock date, as the column stores it (an offset is dropped, not converted)
+    return value
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday()) # Monday
+
+
+def bump_order_stats(db: Session, orders, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) `orders` from the daily and weekly rollups in the current transaction.
+
+    Takes Order objects or anything with order_date, supplier_id, product_id,
+    quantity_ordered and total_volume.
+    """
+    daily = {}
+    for o in orders:
+        day = _day(o.order_date or datetime.utcnow())
+        totals = daily.setdefault((day, o.supplier_id, o.product_id), [0, 0, 0.0])
+        totals[0] += sign
+        totals[1] += sign * o.quantity_ordered
+        totals[2] += sign * float(o.total_volume or 0)
+    weekly = {}
+    for (day, supplier_id, product_id), totals in daily.items():
+        week = weekly.setdefault((week_start(day), supplier_id, product_id), [0, 0, 0.0])
+        for i, n in enumerate(totals):
+            week[i] += n
+    upsert_add(db, OrderDailyStats, ("day", "supplier_id", "product_id"), ORDER_COLUMNS, [
+        {"day": day, "supplier_id": supplier_id, "product_id": product_id, **dict(zip(ORDER_COLUMNS, totals))}
+        for (day, supplier_id, product_id), totals in daily.items()
+    ])
+    upsert_add(db, OrderWeeklyStats, ("week_start", "supplier_id", "product_id"), ORDER_COLUMNS, [
+        {"week_start": week, "supplier_id": supplier_id, "product_id": product_id, **dict(zip(ORDER_COLUMNS, totals))}
+        for (week, supplier_id, product_id), totals in weekly.items()
+    ])
+
+
+def bump_shipment_stats(db: Session, changes):
+    """Apply (shipment_date, status, +/-n) changes to the shipment rollup in the current transaction."""
+    counts = {}
+    for shipment_date, status, n in changes:
+        day = _day(shipment_date)
+        if day is None or status is None or not n:
+            continue
+        counts[(day, status)] = counts.get((day, status), 0) + n
+    upsert_add(db, ShipmentDailyStats, ("day", "status"), ("shipments",), [
+        {"day": day, "status": status, "shipments": n} for (day, status), n in counts.items() if n
+    ])
+
+
+def move_shipment_stats(db: Session, old: tuple, new: tuple):
+    # old/new are (shipment_date, status) before and after an update
+    if (_day(old[0]), old[1]) != (_day(new[0]), new[1]):
+        bump_shipment_stats(db, [(*old, -1), (*new, 1)])
+
+
+def rebuild_analytics(db: Session):
+    """Recompute all rollup rows from the orders and shipment tables.
+
+    Backfills databases that predate the rollups and repairs drift. Writes are
+    incremental, so this does not need to run on a schedule.
+    """
+    day = func.date(Order.order_date)
+    daily = [
+        {"day": _day(d), "supplier_id": supplier_id, "product_id": product_id, "orders": n, "quantity": int(quantity or 0), "volume": float(volume or 0)}
+        for d, supplier_id, product_id, n, quantity, volume in db.query(
+            day, Order.supplier_id, Order.product_id,
+            func.count(Order.order_id), func.sum(Order.quantity_ordered), func.sum(Order.total_volume),
+        )
+        .filter(Order.order_date != None)
+        .group_by(day, Order.supplier_id, Order.product_id)
+    ]
+    weekly = {}
+    for row in daily:
+        week = weekly.setdefault((week_start(row["day"]), row["supplier_id"], row["product_id"]), dict.fromkeys(ORDER_COLUMNS, 0))
+        for c in ORDER_COLUMNS:
+            week[c] += row[c]
+    ship_day = func.date(Shipment.shipment_date)
+    shipments = [
+        {"day": _day(d), "status": status, "shipments": n}
+        for d, status, n in db.query(ship_day, Shipment.status, func.count(Shipment.shipment_id))
+        .filter(Shipment.shipment_date != None)
+        .group_by(ship_day, Shipment.status)
+    ]
+
+    for model in (OrderDailyStats, OrderWeeklyStats, ShipmentDailyStats):
+        db.query(model).delete(synchronize_session=False)
+    db.bulk_insert_mappings(OrderDailyStats, daily)
+    db.bulk_insert_mappings(OrderWeeklyStats, [
+        {"week_start": week, "supplier_id": supplier_id, "product_id": product_id, **totals}
+        for (week, supplier_id, product_id), totals in weekly.items()
+    ])
+    db.bulk_insert_mappings(ShipmentDailyStats, shipments)
+    db.commit()
+
+
+def run_analytics_backfill() -> bool:
+    # Runs once at startup; owns its session. Returns True if the rollups were rebuilt.
+    db = SessionLocal()
+    try:
+        empty = db.query(OrderDailyStats.day).first() is None and db.query(ShipmentDailyStats.day).first() is None
+        if empty and (db.query(Order.order_id).first() is not None or db.query(Shipment.shipment_id).first() is not None):
+            # Rollups have never been built for this database (new tables or imported data)
+            rebuild_analytics(db)
+            return True
+        return False
+    finally:
+        db.close()
+
+
+def order_series(db: Session, granularity: str, start: date | None, end: date | None, supplier_id: int | None = None, product_id: int | None = None, group_by: str | None = None) -> list[dict]:
+    """Order totals per period, optionally filtered and split by supplier or product."""
+    model, period = ORDER_TABLES[granularity]
+    keys = [period]
+    if group_by == "supplier":
+        keys.append(model.supplier_id)
+    elif group_by == "product":
+        keys.append(model.product_id)
+    query = db.query(*keys, func.sum(model.orders), func.sum(model.quantity), func.sum(model.volume))
+    if start is not None:
+        query = query.filter(period >= (week_start(start) if granularity == "week" else start))
+    if end is not None:
+        query = query.filter(period <= end)
+    if supplier_id is not None:
+        query = query.filter(model.supplier_id == supplier_id)
+    if product_id is not None:
+        query = query.filter(model.product_id == product_id)
+    # Cancelled orders leave rows at zero; skip them
+    query = query.group_by(*keys).having(func.sum(model.orders) != 0).order_by(*keys)
+
+    points = []
+    for row in query:
+        point = {"period": _day(row[0]), "supplier_id": supplier_id, "product_id": product_id}
+        if group_by:
+            point[f"{group_by}_id"] = row[1]
+        orders, quantity, volume = row[-3:]
+        point.update(orders=int(orders), quantity=int(quantity or 0), volume=float(volume or 0))
+        points.append(point)
+    return points
+
+
+def shipment_series(db: Session, granularity: str, start: date | None, end: date | None, status: str | None = None) -> list[dict]:
+    """Shipment counts per period and status."""
+    if granularity == "week" and start is not None:
+        start = week_start(start)
+    query = db.query(ShipmentDailyStats.day, ShipmentDailyStats.status, ShipmentDailyStats.shipments).filter(ShipmentDailyStats.shipments != 0)
+    if start is not None:
+        query = query.filter(ShipmentDailyStats.day >= start)
+    if end is not None:
+        query = query.filter(ShipmentDailyStats.day <= end)
+    if status is not None:
+        query = query.filter(ShipmentDailyStats.status == status)
+
+    counts = {}
+    for day, row_status, n in query:
+        period = week_start(_day(day)) if granularity == "week" else _day(day)
+        counts[(period, row_status)] = counts.get((period, row_status), 0) + n
+    return [
+        {"period": period, "status": row_status, "shipments": n}
+        for (period, row_status), n in sorted(counts.items())
+    ]
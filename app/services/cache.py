@@ -0,0 +1,166 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    headers: dict
+    tags: tuple
+    expires_at: float
+
+
+class ResponseCache:
+    """In-process LRU + TTL cache of serialized JSON responses, invalidated by tag.
+
+    Each worker process has its own cache, so a write served by another worker is
+    only picked up here once the TTL runs out.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.generation = 0 # bumped on every invalidation
+
+    def get(self, key) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry: CacheEntry, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return # a write landed while this entry was being built; it may be stale
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if any(t in entry.tags for t in tags)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self.generation += 1
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache(maxsize=settings.cache_max_entries, ttl=settings.cache_ttl_seconds)
+
+
+def _cache_key(request: Request):
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def _build_entry(content, headers: dict, tags: tuple) -> CacheEntry:
+    if isinstance(content, bytes):
+        body = content # already encoded, e.g. a ?fields= projection
+    else:
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    return CacheEntry(body, etag, headers, tags, time.monotonic() + response_cache.ttl)
+
+
+def _respond(request: Request, entry: CacheEntry) -> Response:
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if entry.etag in candidates or if_none_match.strip() == "*":
+        response_cache.record_not_modified()
+        # A 304 repeats the headers a cache needs to match it to the stored response
+        return Response(status_code=304, headers={"ETag": entry.etag, **{k: v for k, v in entry.headers.items() if k == "Vary"}})
+    return Response(entry.body, media_type="application/json", headers={"ETag": entry.etag, **entry.headers})
+
+
+def cached_json(request: Request, tags: tuple, loader) -> Response:
+    """Serve `loader()` through the cache.
+
+    `loader` returns `(content, headers)` where content is anything jsonable_encoder
+    accepts (e.g. pydantic models) or an encoded JSON body, and headers are extra
+    response headers worth caching, such as X-Next-Cursor.
+    """
+    key = _cache_key(request)
+    generation = response_cache.generation
+    entry = response_cache.get(key)
+    if entry is None:
+        content, headers = loader()
+        entry = _build_entry(content, headers, tags)
+        response_cache.set(key, entry, generation)
+    return _respond(request, entry)
+
+
+async def cached_json_async(request: Request, tags: tuple, loader) -> Response:
+    """`cached_json` for async routers; `loader` is a coroutine function."""
+    key = _cache_key(request)
+    generation = response_cache.generation
+    entry = response_cache.get(key)
+    if entry is None:
+        content, headers = await loader()
+        entry = _build_entry(content, headers, tags)
+        response_cache.set(key, entry, generation)
+    return _respond(request, entry)
+
+
+def to_schema(schema, obj):
+    # pydantic v2 validates ORM objects with model_validate(from_attributes=True); v1 uses from_orm
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(obj, from_attributes=True)
+    return schema.from_orm(obj)
+
+
+def page_headers(response: Response) -> dict:
+    # Carry the pagination cursor set by paginate() into the cached entry. List pages are
+    # JSON or Arrow depending on Accept (see projection.py), so every one says so in Vary.
+    headers = {k: v for k, v in response.headers.items() if k.lower() == "x-next-cursor"}
+    headers["Vary"] = "Accept"
+    return headers
+
+
+def invalidate_products(*product_ids):
+    response_cache.invalidate("products:list", *(f"product:{pid}" for pid in product_ids))
+
+
+def invalidate_suppliers(*supplier_ids):
+    response_cache.invalidate("suppliers:list", *(f"supplier:{sid}" for sid in supplier_ids))
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChangeLog, Order, Product, Shipment, Supplier
+
+# model -> (entity name in the feed, primary key attribute)
+TRACKED = {
+    Supplier: ("supplier", "supplier_id"),
+    Product: ("product", "product_id"),
+    Order: ("order", "order_id"),
+    Shipment: ("shipment", "shipment_id"),
+}
+
+# A missing seq can be a transaction that has flushed but not committed yet
+# (MySQL hands out auto-increment values before commit). Readers stop in front
+# of a gap until it is this old; after that it was a rollback and is skipped.
+GAP_WAIT = timedelta(seconds=5)
+
+
+def record_changes(db: Session, entity: str, ids, op: str = "update"):
+    """Log rows changed by Core or bulk statements, which the flush hook can't see."""
+    now = datetime.utcnow()
+    rows = [{"entity": entity, "entity_id": i, "op": op, "changed_at": now} for i in dict.fromkeys(ids)]
+    if rows:
+        db.execute(insert(ChangeLog), rows)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def log_flushed_changes(session: Session, flush_context):
+    # new/dirty/deleted still describe this flush here, and the insert joins its transaction
+    now = datetime.utcnow()
+    rows = []
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            tracked = TRACKED.get(type(obj))
+            if tracked is None:
+                continue
+            if op == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            entity, pk = tracked
+            rows.append({"entity": entity, "entity_id": getattr(obj, pk), "op": op, "changed_at": now})
+    if rows:
+        session.connection().execute(insert(ChangeLog), rows)
+
+
+def head_seq(db: Session) -> int:
+    return db.query(func.max(ChangeLog.seq)).scalar() or 0
+
+
+def oldest_seq(db: Session) -> int | None:
+    return db.query(func.min(ChangeLog.seq)).scalar()
+
+
+def cursor_is_stale(db: Session, since: int) -> bool:
+    """True when `since` can't be continued from: entries after it were purged, or it
+    comes from a log that has since been emptied or reset (a seq the log never reached)."""
+    oldest, newest = db.query(func.min(ChangeLog.seq), func.max(ChangeLog.seq)).one()
+    if newest is None:
+        return since > 0
+    return since < oldest - 1 or since > newest
+
+
+def read_changes(db: Session, since: int, limit: int) -> list[ChangeLog]:
+    """Entries after `since` in seq order, stopping in front of a gap that may still fill."""
+    rows = db.query(ChangeLog).filter(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit).all()
+    settled_before = datetime.utcnow() - GAP_WAIT
+    expected = since + 1
+    page = []
+    for row in rows:
+        if row.seq != expected and row.changed_at > settled_before:
+            break
+        page.append(row)
+        expected = row.seq + 1
+    return page
+
+
+def purge_change_log() -> int:
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=settings.change_log_retention_days)
+        # The newest entry is always kept, so the head cursor never goes backwards
+        purged = db.query(ChangeLog).filter(ChangeLog.changed_at < cutoff, ChangeLog.seq < head_seq(db)).delete(synchronize_session=False)
+        db.commit()
+        return purged
+    finally:
+        db.close()
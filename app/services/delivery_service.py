@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Order, Shipment, Supplier, SupplierDeliveryStats
+from app.services.changes import record_changes
+from app.services.upsert import upsert_add
+
+PENDING = "pending" # not arrived, ETA still ahead
+ON_TIME = "on_time" # arrived on or before the ETA
+LATE = "late" # arrived after the ETA, or still out past it
+
+STATE_COLUMNS = {
+    PENDING: SupplierDeliveryStats.pending,
+    ON_TIME: SupplierDeliveryStats.on_time,
+    LATE: SupplierDeliveryStats.late,
+}
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    # Columns are naive UTC; request bodies may carry an offset
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def delivery_state(estimated_arrival_date: datetime, actual_arrival_date: datetime | None, now: datetime | None = None) -> str:
+    eta = _naive_utc(estimated_arrival_date)
+    actual = _naive_utc(actual_arrival_date)
+    if actual is not None:
+        return ON_TIME if actual <= eta else LATE
+    return LATE if eta < (now or datetime.utcnow()) else PENDING
+
+
+def shipment_supplier_id(db: Session, shipment: Shipment) -> int | None:
+    # A shipment's orders all share one supplier; the primary order is enough
+    if shipment.order_id is None:
+        return None
+    return db.query(Order.supplier_id).filter(Order.order_id == shipment.order_id).scalar()
+
+
+def bump_rollup(db: Session, supplier_id: int | None, deltas: dict):
+    """Add `deltas` ({state: +/-n}) to the supplier's rollup row in the current transaction."""
+    if supplier_id is None or not any(deltas.values()):
+        return
+    # One upsert, so two writers can't both find the row missing and race to insert it
+    # (create_supplier adds the row up front; this covers suppliers that predate the rollup)
+    upsert_add(db, SupplierDeliveryStats, ("supplier_id",), tuple(STATE_COLUMNS), [
+        {"supplier_id": supplier_id, **{state: deltas.get(state, 0) for state in STATE_COLUMNS}}
+    ])
+
+
+def refresh_delivery_state(db: Session, shipment: Shipment, supplier_id: int | None = None, now: datetime | None = None):
+    """Recompute `shipment.delivery_state` after a write and move its rollup count.
+
+    Call before commit, with the shipment row locked for updates, so the state
+    and the rollup change in the same transaction.
+    """
+    new_state = delivery_state(shipment.estimated_arrival_date, shipment.actual_arrival_date, now)
+    old_state = shipment.delivery_state # None for a shipment not yet inserted
+    if new_state == old_state:
+        return
+    shipment.delivery_state = new_state
+    if supplier_id is None:
+        supplier_id = shipment_supplier_id(db, shipment)
+    deltas = {new_state: 1}
+    if old_state:
+        deltas[old_state] = -1
+    bump_rollup(db, supplier_id, deltas)
+
+
+def sweep_overdue(db: Session, now: datetime | None = None, batch_size: int = 1000) -> int:
+    """Mark pending shipments whose ETA has passed as late. Returns how many moved.
+
+    Reads the (delivery_state, estimated_arrival_date) index, so a sweep only
+    touches shipments that just went overdue. Each UPDATE re-checks the state,
+    so concurrent sweeps (one per worker) never count a shipment twice.
+    """
+    now = now or datetime.utcnow()
+    moved_total = 0
+    while True:
+        rows = (
+            db.query(Shipment.shipment_id, Order.supplier_id)
+            .outerjoin(Order, Order.order_id == Shipment.order_id)
+            .filter(Shipment.delivery_state == PENDING, Shipment.estimated_arrival_date < now)
+            .limit(batch_size)
+            .all()
+        )
+        by_supplier = {}
+        for shipment_id, supplier_id in rows:
+            by_supplier.setdefault(supplier_id, []).append(shipment_id)
+        for supplier_id, shipment_ids in by_supplier.items():
+            moved = db.query(Shipment).filter(
+                Shipment.shipment_id.in_(shipment_ids),
+                Shipment.delivery_state == PENDING,
+            ).update({Shipment.delivery_state: LATE}, synchronize_session=False)
+            bump_rollup(db, supplier_id, {PENDING: -moved, LATE: moved})
+            if moved:
+                record_changes(db, "shipment", shipment_ids)
+            moved_total += moved
+        db.commit()
+        if len(rows) < batch_size:
+            return moved_total
+
+
+def rebuild_delivery_stats(db: Session, now: datetime | None = None):
+    """Recompute every delivery_state and all rollup rows from scratch.
+
+    Backfills databases that predate the column and repairs drift. Writes are
+    incremental, so this does not need to run on a schedule.
+    """
+    now = now or datetime.utcnow()
+    db.query(Shipment).update(
+        {
+            Shipment.delivery_state: case(
+                (Shipment.actual_arrival_date == None, case((Shipment.estimated_arrival_date < now, LATE), else_=PENDING)),
+                (Shipment.actual_arrival_date <= Shipment.estimated_arrival_date, ON_TIME),
+                else_=LATE,
+            )
+        },
+        synchronize_session=False,
+    )
+    counts = {
+        supplier_id: row
+        for supplier_id, *row in db.query(
+            Order.supplier_id,
+            *(func.sum(case((Shipment.delivery_state == state, 1), else_=0)) for state in STATE_COLUMNS),
+        )
+        .select_from(Shipment)
+        .join(Order, Order.order_id == Shipment.order_id)
+        .group_by(Order.supplier_id)
+    }
+    supplier_ids = {supplier_id for (supplier_id,) in db.query(Supplier.supplier_id)} | set(counts)
+    db.query(SupplierDeliveryStats).delete(synchronize_session=False)
+    db.bulk_insert_mappings(SupplierDeliveryStats, [
+        {"supplier_id": supplier_id, **dict(zip(STATE_COLUMNS, (int(n or 0) for n in counts.get(supplier_id, (0, 0, 0)))))}
+        for supplier_id in supplier_ids
+    ])
+    db.commit()
+
+
+def run_overdue_sweep() -> int:
+    # Entry point for the background loop in main; owns its session
+    db = SessionLocal()
+    try:
+        if db.query(SupplierDeliveryStats.supplier_id).first() is None and db.query(Shipment.shipment_id).first() is not None:
+            # Rollups have never been built for this database (new table or imported data)
+            rebuild_delivery_stats(db)
+            return 0
+        return sweep_overdue(db)
+    finally:
+        db.close()
+
+
+def rollup_out(row: SupplierDeliveryStats) -> dict:
+    closed = row.on_time + row.late
+    return {
+        "supplier_id": row.supplier_id,
+        "pending": row.pending,
+        "on_time": row.on_time,
+        "late": row.late,
+        "on_time_rate": round(row.on_time / closed, 4) if closed else None,
+    }
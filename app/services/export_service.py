@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, type_coerce, Integer, DECIMAL, DateTime
+from sqlalchemy.types import NullType
+from app.database import SessionLocal
+from app.models import Order, Product, Shipment, Supplier
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_ENTITIES = {
+    "orders": Order,
+    "shipments": Shipment,
+    "products": Product,
+    "suppliers": Supplier,
+}
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": ARROW_STREAM,
+}
+
+# Filters each entity can apply; any other filter is rejected instead of exporting everything
+EXPORT_FILTERS = {
+    Order: {"start_date", "end_date", "supplier_id"},
+    Shipment: {"start_date", "end_date", "supplier_id"},
+    Product: set(),
+    Supplier: {"supplier_id"},
+}
+
+
+def unsupported_filters(model, **filters) -> list[str]:
+    return [name for name, value in filters.items() if value is not None and name not in EXPORT_FILTERS[model]]
+
+
+def export_statement(model, start_date: datetime | None = None, end_date: datetime | None = None, supplier_id: int | None = None):
+    columns = list(model.__table__.columns)
+    stmt = select(*columns).order_by(*model.__table__.primary_key.columns)
+
+    date_column = {Order: Order.order_date, Shipment: Shipment.shipment_date}.get(model)
+    if date_column is not None:
+        if start_date:
+            stmt = stmt.where(date_column >= start_date)
+        if end_date:
+            stmt = stmt.where(date_column <= end_date)
+
+    if supplier_id is not None:
+        if model is Order or model is Supplier:
+            stmt = stmt.where(model.supplier_id == supplier_id)
+        elif model is Shipment:
+            stmt = stmt.where(Shipment.shipment_id.in_(select(Order.shipment_id).where(Order.supplier_id == supplier_id)))
+    return columns, stmt
+
+
+def stream_chunks(stmt):
+    # Own session: the generator outlives the request handler. yield_per turns on a
+    # server-side cursor, so only one chunk of rows is held in memory at a time.
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            yield rows
+    finally:
+        db.close()
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_csv(columns, stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.name for c in columns])
+    for rows in stream_chunks(stmt):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(columns, stmt):
+    names = [c.name for c in columns]
+    for rows in stream_chunks(stmt):
+        yield "".join(
+            json.dumps({n: _json_value(v) for n, v in zip(names, row)}) + "\n" for row in rows
+        ).encode()
+
+
+class _ChunkSink:
+    """Minimal writable file that hands back whatever pyarrow wrote since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_schema(columns):
+    def arrow_type(column):
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, DECIMAL):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")
+        return pa.string()
+    return pa.schema([(c.name, arrow_type(c)) for c in columns])
+
+
+def raw_statement(columns, stmt):
+    """`stmt` with DateTime and DECIMAL columns fetched as the driver returns them.
+
+    SQLAlchemy otherwise parses every SQLite timestamp string and builds a Decimal
+    per value; record_batch leaves both to pyarrow's vectorised casts instead.
+    """
+    return stmt.with_only_columns(*(
+        type_coerce(c, NullType()) if isinstance(c.type, (DateTime, DECIMAL)) else c for c in columns
+    ))
+
+
+def record_batch(schema, rows):
+    # Rows may carry trailing columns beyond the schema (e.g. pagination keys); they are ignored
+    arrays = []
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    for field, values in zip(schema, columns):
+        if pa.types.is_floating(field.type) or pa.types.is_timestamp(field.type):
+            # datetime / ISO string, Decimal / float: let pyarrow infer and cast the whole column
+            array = pa.array(values)
+            arrays.append(array if array.type == field.type else array.cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def arrow_stream_bytes(columns, rows) -> bytes:
+    """`rows` as a single-batch Arrow IPC stream."""
+    schema = arrow_schema(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(record_batch(schema, rows))
+    return sink.getvalue().to_pybytes()
+
+
+def iter_parquet(columns, stmt):
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in stream_chunks(raw_statement(columns, stmt)):
+            # One row group per chunk
+            writer.write_batch(record_batch(schema, rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(columns, stmt):
+    # Arrow IPC stream, one record batch per chunk; pyarrow.ipc.open_stream reads it back
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for rows in stream_chunks(raw_statement(columns, stmt)):
+            writer.write_batch(record_batch(schema, rows))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {
+    "csv": iter_csv,
+    "ndjson": iter_ndjson,
+    "parquet": iter_parquet,
+    "arrow": iter_arrow,
+}
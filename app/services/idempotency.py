@@ -0,0 +1,145 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc, insert
+from app.config import settings
+from app.database import SessionLocal
+from app.models import IdempotencyKey
+from app.services.cache import to_schema
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+# A claim with no stored result after this long belongs to a request that died
+# (worker killed between the write and storing its response); let a retry take over
+ABANDONED_AFTER = timedelta(minutes=2)
+
+
+def request_hash(payload) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(row: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(json.loads(row.response_body), status_code=row.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+def _claim(scope: str, key: str, digest: str) -> JSONResponse | None:
+    """Insert the in-progress row for `key`, or return the response stored by an earlier request.
+
+    The claim commits on its own session before the handler runs, so a concurrent
+    duplicate hits the primary key and waits here for the original to finish.
+    """
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    db = SessionLocal()
+    try:
+        while True:
+            now = datetime.utcnow()
+            try:
+                db.execute(insert(IdempotencyKey).values(
+                    scope=scope,
+                    key=key,
+                    request_hash=digest,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds),
+                ))
+                db.commit()
+                return None
+            except exc.IntegrityError:
+                db.rollback()
+
+            row = db.get(IdempotencyKey, (scope, key), populate_existing=True)
+            if row is None:
+                continue # removed since our insert failed; claim again
+            if row.expires_at < now or (row.status_code is None and row.created_at < now - ABANDONED_AFTER):
+                db.query(IdempotencyKey).filter(
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.created_at == row.created_at,
+                ).delete(synchronize_session=False)
+                db.commit()
+                continue
+            if row.request_hash != digest:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            if row.status_code is not None:
+                return _replay(row)
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            db.rollback() # end the read transaction so the next poll sees the original's commit
+            time.sleep(POLL_SECONDS)
+    finally:
+        db.close()
+
+
+def _complete(scope: str, key: str, status_code: int, content):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).update(
+            {IdempotencyKey.status_code: status_code, IdempotencyKey.response_body: json.dumps(content, separators=(",", ":"))},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(scope: str, key: str):
+    # The request failed without a definite answer; drop the claim so a retry runs it again
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope, IdempotencyKey.key == key, IdempotencyKey.status_code == None
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def idempotent(scope: str, key: str | None, payload, schema, handler):
+    """Run `handler()` at most once per (scope, Idempotency-Key).
+
+    Without a key the handler just runs. With one, the first request runs the
+    handler and stores its response (successes and 4xx errors); retries and
+    concurrent duplicates get that response back with Idempotent-Replayed: true.
+    Reusing a key with a different payload is rejected with 422.
+    """
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    stored = _claim(scope, key, request_hash(payload))
+    if stored is not None:
+        return stored
+
+    try:
+        result = handler()
+    except HTTPException as e:
+        if e.status_code < 500:
+            _complete(scope, key, e.status_code, {"detail": e.detail})
+        else:
+            _release(scope, key)
+        raise
+    except Exception:
+        _release(scope, key)
+        raise
+
+    content = jsonable_encoder(to_schema(schema, result))
+    _complete(scope, key, 200, content)
+    return JSONResponse(content)
+
+
+def purge_expired_keys() -> int:
+    db = SessionLocal()
+    try:
+        purged = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return purged
+    finally:
+        db.close()
@@ -0,0 +1,249 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Product, StockMovement, StockShard, StockSnapshot
+from app.services.changes import record_changes
+from app.services.cache import invalidate_products
+
+# Stock for a product lives in one of two places:
+#   stock_shards == 1 -> product.quantity_available, updated in place (the default)
+#   stock_shards  > 1 -> StockShard rows, each holding a slice of the stock. Orders
+#                        take from a random shard, so concurrent orders for a hot
+#                        product lock different rows. product.quantity_available is
+#                        refreshed from the shards by compact_stock_shards.
+# Every change is also appended to the StockMovement ledger in the same transaction.
+
+MAX_STOCK_SHARDS = 64
+LEDGER_COMPACT_BATCH = 50000
+
+
+def record_movement(db: Session, product_id: int, delta: int, reason: str, order_id: int | None = None):
+    record_movements(db, [(product_id, delta, reason, order_id)])
+
+
+def record_movements(db: Session, movements):
+    """Append (product_id, delta, reason, order_id) rows to the stock ledger."""
+    now = datetime.utcnow()
+    rows = [
+        {"product_id": product_id, "delta": delta, "reason": reason, "order_id": order_id, "created_at": now}
+        for product_id, delta, reason, order_id in movements
+        if delta
+    ]
+    if rows:
+        db.execute(insert(StockMovement), rows)
+
+
+def _split(total: int, count: int) -> list[int]:
+    base, extra = divmod(total, count)
+    return [base + (1 if i < extra else 0) for i in range(count)]
+
+
+def _locked_shards(db: Session, product_id: int) -> list[int]:
+    # Always locked in shard order, so two transactions locking every shard can't deadlock each other
+    return [
+        quantity for (quantity,) in db.query(StockShard.quantity)
+        .filter(StockShard.product_id == product_id)
+        .order_by(StockShard.shard)
+        .with_for_update()
+    ]
+
+
+def _write_shards(db: Session, product_id: int, quantities: list[int]):
+    db.connection().execute(
+        update(StockShard)
+        .where(StockShard.product_id == product_id, StockShard.shard == bindparam("s"))
+        .values(quantity=bindparam("q")),
+        [{"s": shard, "q": quantity} for shard, quantity in enumerate(quantities)],
+    )
+
+
+def stock_levels(db: Session, product_ids) -> dict:
+    """Exact available stock per product: one row each, plus one grouped read for sharded products."""
+    rows = db.query(Product.product_id, Product.quantity_available, Product.stock_shards).filter(
+        Product.product_id.in_(set(product_ids))
+    ).all()
+    levels = {product_id: quantity for product_id, quantity, _ in rows}
+    sharded = [product_id for product_id, _, shards in rows if shards > 1]
+    if sharded:
+        levels.update(
+            (product_id, int(total))
+            for product_id, total in db.query(StockShard.product_id, func.sum(StockShard.quantity))
+            .filter(StockShard.product_id.in_(sharded))
+            .group_by(StockShard.product_id)
+        )
+    return levels
+
+
+def take_stock(db: Session, product_id: int, quantity: int) -> bool:
+    """Remove `quantity` units if that many are available. Returns False otherwise."""
+    shards = db.query(Product.stock_shards).filter(Product.product_id == product_id).scalar()
+    if shards is None:
+        return False
+    if shards <= 1:
+        # Check and decrement in one conditional UPDATE so concurrent orders can't both pass the check
+        updated = db.query(Product).filter(
+            Product.product_id == product_id,
+            Product.quantity_available >= quantity,
+        ).update(
+            {Product.quantity_available: Product.quantity_available - quantity},
+            synchronize_session=False,
+        )
+    else:
+        updated = _take_from_shards(db, product_id, shards, quantity)
+    if updated:
+        record_changes(db, "product", [product_id])
+    return bool(updated)
+
+
+def _take_from_shards(db: Session, product_id: int, shards: int, quantity: int) -> bool:
+    # Fast path: one conditional UPDATE on a random shard that looked big enough
+    candidates = [
+        shard for shard, available in db.query(StockShard.shard, StockShard.quantity).filter(StockShard.product_id == product_id)
+        if available >= quantity
+    ]
+    if candidates:
+        updated = db.query(StockShard).filter(
+            StockShard.product_id == product_id,
+            StockShard.shard == random.choice(candidates),
+            StockShard.quantity >= quantity,
+        ).update({StockShard.quantity: StockShard.quantity - quantity}, synchronize_session=False)
+        if updated:
+            return True
+    # No single shard holds enough (low stock or a large order), or we lost a race: lock them all and drain in order
+    quantities = _locked_shards(db, product_id)
+    if sum(quantities) < quantity:
+        return False
+    remaining = quantity
+    for shard, available in enumerate(quantities):
+        taken = min(available, remaining)
+        quantities[shard] -= taken
+        remaining -= taken
+    _write_shards(db, product_id, quantities)
+    return True
+
+
+def put_stock(db: Session, product_id: int, quantity: int) -> bool:
+    """Add `quantity` units back. Returns False if the product does not exist."""
+    shards = db.query(Product.stock_shards).filter(Product.product_id == product_id).scalar()
+    if shards is None:
+        return False
+    if shards <= 1:
+        db.query(Product).filter(Product.product_id == product_id).update(
+            {Product.quantity_available: Product.quantity_available + quantity},
+            synchronize_session=False,
+        )
+    else:
+        db.query(StockShard).filter(
+            StockShard.product_id == product_id,
+            StockShard.shard == random.randrange(shards),
+        ).update({StockShard.quantity: StockShard.quantity + quantity}, synchronize_session=False)
+    record_changes(db, "product", [product_id])
+    return True
+
+
+def set_stock(db: Session, product: Product, quantity: int) -> int:
+    """Overwrite the available stock (a stock count correction). Returns the change applied."""
+    db.refresh(product, with_for_update=True)
+    if product.stock_shards > 1:
+        old = sum(_locked_shards(db, product.product_id))
+        _write_shards(db, product.product_id, _split(quantity, product.stock_shards))
+    else:
+        old = product.quantity_available
+    product.quantity_available = quantity
+    return quantity - old
+
+
+def reshard_stock(db: Session, product: Product, count: int):
+    """Spread the product's stock over `count` shard rows, or fold it back into the product row when 1."""
+    db.refresh(product, with_for_update=True)
+    if product.stock_shards > 1:
+        total = sum(_locked_shards(db, product.product_id))
+    else:
+        total = product.quantity_available
+    db.query(StockShard).filter(StockShard.product_id == product.product_id).delete(synchronize_session=False)
+    if count > 1:
+        db.execute(insert(StockShard), [
+            {"product_id": product.product_id, "shard": shard, "quantity": quantity}
+            for shard, quantity in enumerate(_split(total, count))
+        ])
+    product.stock_shards = count
+    product.quantity_available = total
+
+
+def compact_stock_shards(db: Session) -> int:
+    """Sum each sharded product's shards into product.quantity_available, and rebalance drained shards.
+
+    List endpoints, low-stock filters and /stats read the product row, so for
+    sharded products they lag by up to STOCK_COMPACT_SECONDS. Returns how many
+    products changed.
+    """
+    snapshot = dict(db.query(Product.product_id, Product.quantity_available).filter(Product.stock_shards > 1))
+    changed = []
+    for product_id, total, smallest, count in (
+        db.query(StockShard.product_id, func.sum(StockShard.quantity), func.min(StockShard.quantity), func.count())
+        .group_by(StockShard.product_id)
+        .all()
+    ):
+        if product_id not in snapshot:
+            continue
+        total = int(total)
+        if total != snapshot[product_id]:
+            db.query(Product).filter(Product.product_id == product_id).update(
+                {Product.quantity_available: total}, synchronize_session=False
+            )
+            # Logged in the same transaction as the update, like every other write
+            record_changes(db, "product", [product_id])
+            changed.append(product_id)
+        if smallest * count * 2 < total:
+            # A shard below half its share pushes orders onto the lock-every-shard path; even them out
+            _write_shards(db, product_id, _split(sum(_locked_shards(db, product_id)), count))
+        db.commit()
+    if changed:
+        invalidate_products(*changed)
+    return len(changed)
+
+
+def compact_stock_ledger(db: Session, now: datetime | None = None) -> int:
+    """Fold movements older than the retention window into per-product snapshots. Returns how many were folded."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=settings.stock_ledger_retention_days)
+    last = db.query(func.max(StockMovement.movement_id)).filter(StockMovement.created_at < cutoff).scalar()
+    folded_total = 0
+    start = db.query(func.min(StockMovement.movement_id)).scalar()
+    while last is not None and start is not None and start <= last:
+        end = min(start + LEDGER_COMPACT_BATCH - 1, last)
+        window = (StockMovement.movement_id >= start, StockMovement.movement_id <= end)
+        sums = db.query(StockMovement.product_id, func.sum(StockMovement.delta)).filter(*window).group_by(StockMovement.product_id).all()
+        snapshots = {s.product_id: s for s in db.query(StockSnapshot).filter(StockSnapshot.product_id.in_([p for p, _ in sums]))}
+        taken_at = datetime.utcnow()
+        for product_id, delta in sums:
+            snapshot = snapshots.get(product_id)
+            if snapshot is None:
+                snapshot = StockSnapshot(product_id=product_id, quantity=0)
+                db.add(snapshot)
+            snapshot.quantity += int(delta)
+            snapshot.as_of_movement_id = end
+            snapshot.taken_at = taken_at
+        folded_total += db.query(StockMovement).filter(*window).delete(synchronize_session=False)
+        db.commit()
+        start = end + 1
+    return folded_total
+
+
+def run_stock_compaction():
+    # Entry point for the background loop in main; owns its session
+    db = SessionLocal()
+    try:
+        return compact_stock_shards(db)
+    finally:
+        db.close()
+
+
+def run_ledger_compaction():
+    db = SessionLocal()
+    try:
+        return compact_stock_ledger(db)
+    finally:
+        db.close()
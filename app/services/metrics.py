@@ -0,0 +1,240 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.config import settings
+
+logger = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+
+class MetricFamily:
+    """One named metric with a child per label set (counter, gauge or histogram)."""
+
+    def __init__(self, name: str, kind: str, help: str, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.buckets = buckets
+        self.children = {}
+
+    def _child(self, labels: tuple):
+        child = self.children.get(labels)
+        if child is None:
+            child = Histogram(self.buckets) if self.kind == "histogram" else [0.0]
+            self.children[labels] = child
+        return child
+
+    def inc(self, labels: tuple = (), amount: float = 1.0):
+        self._child(labels)[0] += amount
+
+    def observe(self, labels: tuple, value: float):
+        self._child(labels).observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.families = {}
+
+    def family(self, name, kind, help, label_names=(), buckets=None) -> MetricFamily:
+        fam = MetricFamily(name, kind, help, buckets)
+        fam.label_names = label_names
+        self.families[name] = fam
+        return fam
+
+    def inc(self, fam: MetricFamily, labels: tuple = (), amount: float = 1.0):
+        with self._lock:
+            fam.inc(labels, amount)
+
+    def observe(self, fam: MetricFamily, labels: tuple, value: float):
+        with self._lock:
+            fam.observe(labels, value)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for fam in self.families.values():
+                render_family(lines, fam.name, fam.kind, fam.help, fam.label_names, fam.children)
+            return "\n".join(lines) + "\n"
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_family(lines: list, name, kind, help, label_names, children: dict):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, child in children.items():
+        if kind == "histogram":
+            cumulative = 0
+            for bound, count in zip([*child.buckets, "+Inf"], child.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {child.sum}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {child.count}")
+        else:
+            lines.append(f"{name}{_labels(label_names, labels)} {child[0]}")
+
+
+registry = Registry()
+
+REQUESTS = registry.family("http_requests_total", "counter", "HTTP requests by route and status.", ("method", "route", "status"))
+IN_FLIGHT = registry.family("http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+LATENCY = registry.family("http_request_duration_seconds", "histogram", "Time from request start to last response byte.", ("method", "route"), LATENCY_BUCKETS)
+NON_DB_TIME = registry.family("http_request_non_db_seconds", "histogram", "Request time not spent in the database (validation, serialization, app code).", ("method", "route"), LATENCY_BUCKETS)
+RESPONSE_SIZE = registry.family("http_response_size_bytes", "histogram", "Response body size.", ("method", "route"), SIZE_BUCKETS)
+REQUEST_QUERIES = registry.family("db_queries_per_request", "histogram", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = registry.family("db_time_per_request_seconds", "histogram", "Time spent executing SQL per request.", ("method", "route"), LATENCY_BUCKETS)
+QUERY_DURATION = registry.family("db_query_duration_seconds", "histogram", "Duration of individual SQL statements.", (), LATENCY_BUCKETS)
+SLOW_QUERIES = registry.family("db_slow_queries_total", "counter", "SQL statements slower than the slow-query threshold.")
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+slow_query_log = deque(maxlen=settings.slow_query_log_size)
+
+
+def install_query_hooks(engine):
+    """Time every statement on `engine` and attribute it to the request in progress."""
+
+    # The start time lives on the statement's execution context, not the pooled connection,
+    # so a statement that fails (no after_cursor_execute) leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        registry.observe(QUERY_DURATION, (), elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+        if elapsed * 1000 >= settings.slow_query_ms:
+            registry.inc(SLOW_QUERIES)
+            params = repr(parameters)
+            entry = {
+                "at": time.time(),
+                "duration_ms": round(elapsed * 1000, 3),
+                "statement": statement,
+                "parameters": params if len(params) <= 2000 else params[:2000] + "...",
+                "executemany": executemany,
+            }
+            slow_query_log.append(entry)
+            logger.warning("slow query %.1fms: %s %s", entry["duration_ms"], statement, entry["parameters"])
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size, in-flight count and DB time per route.
+
+    Adds a Server-Timing header (db / app) so a single response shows where its time went.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                app_time = time.perf_counter() - start - stats.db_time
+                timing = f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", app;dur={app_time * 1000:.2f}'
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"server-timing", timing.encode())]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        registry.inc(IN_FLIGHT)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.inc(IN_FLIGHT, amount=-1)
+            current_request.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            registry.inc(REQUESTS, (*labels, str(status[0])))
+            registry.observe(LATENCY, labels, elapsed)
+            registry.observe(NON_DB_TIME, labels, max(elapsed - stats.db_time, 0.0))
+            registry.observe(RESPONSE_SIZE, labels, size[0])
+            registry.observe(REQUEST_QUERIES, labels, stats.queries)
+            registry.observe(REQUEST_DB_TIME, labels, stats.db_time)
+
+
+def render_pool_metrics(lines: list, pools: dict):
+    """Append pool occupancy and checkout-wait histograms from database.pool_status()."""
+    gauges = {"size": "db_pool_size", "checked_out": "db_pool_checked_out", "overflow": "db_pool_overflow"}
+    for key, name in gauges.items():
+        children = {(engine,): [status[key]] for engine, status in pools.items() if key in status}
+        render_family(lines, name, "gauge", f"Connection pool {key.replace('_', ' ')}.", ("engine",), children)
+
+    waits = {}
+    for engine, status in pools.items():
+        if "wait_buckets" not in status:
+            continue
+        h = Histogram(tuple(float(b) for b in status["wait_buckets"] if b != "+Inf"))
+        h.counts = list(status["wait_buckets"].values())
+        h.sum = status["wait_seconds_total"]
+        h.count = status["checkouts"]
+        waits[(engine,)] = h
+    render_family(lines, "db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.", ("engine",), waits)
+    timeouts = {(engine,): [s["timeouts"]] for engine, s in pools.items() if "timeouts" in s}
+    render_family(lines, "db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up waiting for a connection.", ("engine",), timeouts)
+
+
+def render_cache_metrics(lines: list, stats: dict):
+    for key in ("hits", "misses", "not_modified", "invalidations"):
+        render_family(lines, f"response_cache_{key}_total", "counter", f"Response cache {key.replace('_', ' ')}.", (), {(): [stats[key]]})
+    render_family(lines, "response_cache_entries", "gauge", "Entries in the response cache.", (), {(): [stats["entries"]]})
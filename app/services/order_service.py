@@ -1,10 +1,123 @@
 from app.models import Product
-from app.models import Order
+from app.models import Order, Supplier
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
+from app.services.shipment_service import top_up_waiting_shipments
+from app.services.changes import record_changes
+from app.services.inventory_service import stock_levels, take_stock, put_stock, record_movements
+from app.services.analytics_service import bump_order_stats
+from datetime import datetime
 
 
 def check_stock_availabilty(product_id: int, quantity: int, db: Session ) -> bool:
-    product = db.query(Product).filter(Product.product_id == product_id).first()
-    if product and product.quantity_available >= quantity:
-        return True
-    return False
\ No newline at end of file
+    return stock_levels(db, [product_id]).get(product_id, 0) >= quantity
+
+
+def reserve_stock(product_id: int, quantity: int, db: Session) -> float | None:
+    """Take `quantity` units for an order. Returns the product's volume per unit, or None if the stock isn't there.
+
+    Where the dialect has UPDATE ... RETURNING, an unsharded product is checked,
+    decremented and read in that one statement. Sharded products, dialects
+    without it (MySQL) and a failed check go through take_stock.
+    """
+    if db.get_bind().dialect.update_returning:
+        stmt = (
+            update(Product)
+            .where(Product.product_id == product_id, Product.stock_shards <= 1, Product.quantity_available >= quantity)
+            .values(quantity_available=Product.quantity_available - quantity)
+            .returning(Product.volume_per_unit)
+            .execution_options(synchronize_session=False)
+        )
+        row = db.execute(stmt).first()
+        if row is not None:
+            record_changes(db, "product", [product_id])
+            return float(row.volume_per_unit or 1.0)
+    if not take_stock(db, product_id, quantity):
+        return None
+    volume_per_unit = db.query(Product.volume_per_unit).filter(Product.product_id == product_id).scalar()
+    return float(volume_per_unit or 1.0)
+
+
+def release_stock(product_id: int, quantity: int, db: Session) -> bool:
+    return put_stock(db, product_id, quantity)
+
+
+def create_orders_bulk(orders: list, db: Session) -> list[dict]:
+    """Reserve stock and insert a batch of validated Ordercreate rows in one transaction.
+
+    Products and suppliers are loaded with one query each, stock is decremented with a
+    single executemany UPDATE (sharded products take from their shards), and a per-row
+    result dict is returned in input order.
+    """
+    product_ids = {o.product_id for o in orders}
+    supplier_ids = {o.supplier_id for o in orders}
+
+    products = {
+        p.product_id: p
+        for p in db.query(Product.product_id, Product.quantity_available, Product.volume_per_unit, Product.stock_shards)
+        .filter(Product.product_id.in_(product_ids))
+        .with_for_update()
+        .all()
+    }
+    sharded = {pid for pid, p in products.items() if p.stock_shards > 1}
+    known_suppliers = {
+        s.supplier_id for s in db.query(Supplier.supplier_id).filter(Supplier.supplier_id.in_(supplier_ids)).all()
+    }
+
+    remaining = {pid: p.quantity_available for pid, p in products.items()}
+    if sharded:
+        remaining.update(stock_levels(db, sharded))
+    reserved = {}
+    results = []
+    accepted = []
+    for index, o in enumerate(orders):
+        if o.product_id not in products:
+            results.append({"index": index, "status": "rejected", "detail": "Product not found"})
+        elif o.supplier_id not in known_suppliers:
+            results.append({"index": index, "status": "rejected", "detail": "Supplier not found"})
+        elif remaining[o.product_id] < o.quantity_ordered:
+            results.append({"index": index, "status": "rejected", "detail": "Insufficient stock available"})
+        else:
+            remaining[o.product_id] -= o.quantity_ordered
+            reserved[o.product_id] = reserved.get(o.product_id, 0) + o.quantity_ordered
+            vol_per_unit = float(products[o.product_id].volume_per_unit or 1.0)
+            db_order = Order(
+                product_id=o.product_id,
+                supplier_id=o.supplier_id,
+                order_date=o.order_date or datetime.utcnow(),
+                quantity_ordered=o.quantity_ordered,
+                total_volume=vol_per_unit * o.quantity_ordered,
+                status="Pending",
+            )
+            result = {"index": index, "status": "created", "detail": None}
+            results.append(result)
+            accepted.append((result, db_order))
+
+    for pid in sharded & set(reserved):
+        # Sharded stock isn't covered by the product row locks above
+        if not take_stock(db, pid, reserved.pop(pid)):
+            db.rollback()
+            raise RuntimeError("Stock changed during bulk reservation")
+    if reserved:
+        stmt = (
+            update(Product)
+            .where(Product.product_id == bindparam("pid"), Product.quantity_available >= bindparam("qty"))
+            .values(quantity_available=Product.quantity_available - bindparam("qty"))
+        )
+        updated = db.connection().execute(stmt, [{"pid": pid, "qty": qty} for pid, qty in reserved.items()])
+        if updated.rowcount not in (-1, len(reserved)):
+            # Stock moved underneath us despite the row locks; nothing from this batch is applied
+            db.rollback()
+            raise RuntimeError("Stock changed during bulk reservation")
+        record_changes(db, "product", reserved)
+
+    new_orders = [db_order for _, db_order in accepted]
+    top_up_waiting_shipments(db, new_orders)
+    db.add_all(new_orders)
+    db.flush()
+    for result, db_order in accepted:
+        result["order_id"] = db_order.order_id
+    record_movements(db, [(o.product_id, -o.quantity_ordered, "order", o.order_id) for o in new_orders])
+    bump_order_stats(db, new_orders)
+    db.commit()
+    return results
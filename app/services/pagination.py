@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from typing import TYPE_CHECKING
+from sqlalchemy import and_, or_, DateTime, Select
+from sqlalchemy.orm import Query
+
+if TYPE_CHECKING:
+    # Only needed for async mode, which requires greenlet
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) else v
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(columns: list, values: list):
+    # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y), spelled out so every backend can seek on the index
+    clauses = []
+    for i, col in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, col > values[i]))
+    return or_(*clauses)
+
+
+def paginate(query: Query, columns: list, cursor: str | None, limit: int, response: Response) -> list:
+    """Return one keyset page of `query` ordered by `columns` (unique, last one being the PK).
+
+    The opaque cursor for the following page is sent in the X-Next-Cursor header,
+    so list endpoints keep returning a plain JSON array.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = query.filter(keyset_filter(columns, decode_cursor(cursor, columns)))
+    rows = query.order_by(*columns).limit(limit + 1).all()
+    return _trim_page(rows, columns, limit, response)
+
+
+async def paginate_async(db: "AsyncSession", stmt: Select, columns: list, cursor: str | None, limit: int, response: Response, scalars: bool = True) -> list:
+    """Async counterpart of `paginate` for 2.0-style `select()` statements.
+
+    With `scalars=False` the rows are returned as is, for column selects.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        stmt = stmt.where(keyset_filter(columns, decode_cursor(cursor, columns)))
+    result = await db.execute(stmt.order_by(*columns).limit(limit + 1))
+    rows = (result.scalars() if scalars else result).all()
+    return _trim_page(rows, columns, limit, response)
+
+
+def _trim_page(rows: list, columns: list, limit: int, response: Response) -> list:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, col.key) for col in columns])
+    return rows
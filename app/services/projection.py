@@ -0,0 +1,105 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import Header, HTTPException, Response
+from sqlalchemy import Select
+from sqlalchemy.orm import Query
+from typing import TYPE_CHECKING
+from app.services.cache import page_headers
+from app.services.export_service import ARROW_STREAM, arrow_stream_bytes, pa
+from app.services.pagination import paginate, paginate_async
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ?fields= on list endpoints. The page is read as plain rows of just the requested
+# columns (plus the pagination keys) and encoded in one call, skipping ORM objects,
+# orm_mode validation and jsonable_encoder, which dominate large pages otherwise.
+# A client that accepts application/vnd.apache.arrow.stream gets the same rows as an
+# Arrow IPC stream instead, which pandas loads without parsing or pivoting.
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    # orjson when installed; same output shape either way
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def accepts_arrow(response: Response, accept: str | None = Header(None)) -> bool:
+    """Dependency: True when the Accept header lists the Arrow stream type (and pyarrow is installed).
+
+    Also marks the response as varying on Accept, whichever format it ends up in.
+    """
+    response.headers["Vary"] = "Accept"
+    if pa is None or not accept:
+        return False
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        if media_type == ARROW_STREAM:
+            return not any(p.replace(" ", "") in ("q=0", "q=0.0") for p in params)
+    return False
+
+
+def _schema_fields(schema) -> list[str]:
+    return list(getattr(schema, "model_fields", None) or schema.__fields__)
+
+
+def projection(model, schema, fields: str | None, keys: list) -> tuple[list[str], list]:
+    """Names and columns to select for `fields`, a comma-separated subset of the schema's column fields.
+
+    No `fields` selects all of them. The pagination `keys` are appended when not
+    requested, so the next cursor can still be built; they are left out of the
+    output. Unknown names are a 400.
+    """
+    allowed = [name for name in _schema_fields(schema) if name in model.__table__.columns]
+    if fields is None:
+        return allowed, [getattr(model, name) for name in allowed] + [key for key in keys if key.key not in allowed]
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"fields must be a comma-separated list of: {', '.join(allowed)}")
+    columns = [getattr(model, name) for name in names]
+    return names, columns + [key for key in keys if key.key not in names]
+
+
+def _encode(model, names: list[str], rows: list, response: Response, arrow: bool) -> tuple[bytes, dict]:
+    headers = page_headers(response)
+    if arrow:
+        table = model.__table__.columns
+        return arrow_stream_bytes([table[name] for name in names], rows), {**headers, "Content-Type": ARROW_STREAM}
+    return dumps([dict(zip(names, row)) for row in rows]), headers
+
+
+def projected_page(query: Query, model, schema, fields: str | None, keys: list, cursor: str | None, limit: int, arrow: bool = False) -> tuple[bytes, dict]:
+    """One keyset page of `query` with only `fields`, as an encoded body and its headers (X-Next-Cursor, Vary, and the Arrow content type)."""
+    names, columns = projection(model, schema, fields, keys)
+    response = Response()
+    rows = paginate(query.with_entities(*columns), keys, cursor, limit, response)
+    return _encode(model, names, rows, response, arrow)
+
+
+async def projected_page_async(db: "AsyncSession", stmt: Select, model, schema, fields: str | None, keys: list, cursor: str | None, limit: int, arrow: bool = False) -> tuple[bytes, dict]:
+    """Async counterpart of `projected_page` for `select()` statements."""
+    names, columns = projection(model, schema, fields, keys)
+    response = Response()
+    rows = await paginate_async(db, stmt.with_only_columns(*columns), keys, cursor, limit, response, scalars=False)
+    return _encode(model, names, rows, response, arrow)
+
+
+def projected_response(body: bytes, headers: dict) -> Response:
+    # JSON unless `headers` carries the Arrow content type
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,184 @@
+import math
+import threading
+from datetime import date, datetime, timedelta
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChangeLog, OrderDailyStats, Product, StockShard
+from app.services.changes import cursor_is_stale, head_seq
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Demand per product is read from the order_daily_stats rollup (net of cancellations)
+# into a products x days matrix, and the whole catalogue is scored in one pass.
+# The matrix is kept between requests. On each request only the products that the
+# change feed says changed since the last refresh (every order and cancellation
+# moves stock, so it logs a product change) are re-read; a new day, a new or
+# deleted product, or a purged change-log cursor reloads everything.
+
+PARTIAL_REFRESH_RATIO = 0.25 # above this share of changed products a full reload is cheaper
+
+
+class DemandModel:
+    def __init__(self, day, cursor, product_ids, names, stock, demand):
+        self.day = day # last (UTC) day of the window
+        self.cursor = cursor # change-log seq the model is current up to
+        self.product_ids = product_ids # sorted int64
+        self.names = names
+        self.stock = stock # float64, live stock incl. shards
+        self.demand = demand # float64 [product, day], oldest day first
+        self.mean = demand.mean(axis=1)
+        self.std = demand.std(axis=1)
+
+
+_model = None
+_lock = threading.Lock()
+
+
+def _load_products(db: Session, ids=None):
+    query = db.query(Product.product_id, Product.name, Product.quantity_available, Product.stock_shards)
+    shard_query = db.query(StockShard.product_id, func.sum(StockShard.quantity)).group_by(StockShard.product_id)
+    if ids is not None:
+        query = query.filter(Product.product_id.in_(ids))
+        shard_query = shard_query.filter(StockShard.product_id.in_(ids))
+    rows = query.order_by(Product.product_id).all()
+    shard_totals = dict(shard_query.all()) if any(shards > 1 for *_, shards in rows) else {}
+    product_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    names = [r[1] for r in rows]
+    stock = np.fromiter(
+        (shard_totals.get(pid, 0) if shards > 1 else quantity for pid, _, quantity, shards in rows),
+        dtype=np.float64, count=len(rows),
+    )
+    return product_ids, names, stock
+
+
+def _load_demand(db: Session, product_ids, day, ids=None):
+    """Units ordered per product and day over the window ending at `day`, as a matrix."""
+    window = settings.replenishment_window_days
+    start = day - timedelta(days=window - 1)
+    # The day is fetched untyped (text on SQLite) and each distinct value is parsed once
+    raw_day = type_coerce(OrderDailyStats.day, String)
+    stmt = select(OrderDailyStats.product_id, raw_day, func.sum(OrderDailyStats.quantity)).where(
+        OrderDailyStats.day >= start,
+        OrderDailyStats.day <= day,
+    )
+    if ids is not None:
+        stmt = stmt.where(OrderDailyStats.product_id.in_(ids))
+    # Core rows, transposed into columns: no ORM row objects for the whole catalogue
+    rows = db.connection().execute(stmt.group_by(OrderDailyStats.product_id, OrderDailyStats.day)).all()
+
+    demand = np.zeros((len(product_ids), window))
+    if rows:
+        pids, days, quantities = zip(*rows)
+        pids = np.array(pids, dtype=np.int64)
+        offset_of = {d: (date.fromisoformat(str(d)[:10]) - start).days for d in set(days)} # at most `window` distinct days
+        offsets = np.array([offset_of[d] for d in days], dtype=np.int64)
+        quantities = np.array(quantities, dtype=np.float64)
+        index = np.searchsorted(product_ids, pids)
+        known = (index < len(product_ids)) & (product_ids[np.minimum(index, len(product_ids) - 1)] == pids)
+        # Rollup rows of deleted products have no row in the matrix
+        np.add.at(demand, (index[known], offsets[known]), quantities[known])
+    return demand
+
+
+def _full_load(db: Session, day, cursor) -> DemandModel:
+    product_ids, names, stock = _load_products(db)
+    return DemandModel(day, cursor, product_ids, names, stock, _load_demand(db, product_ids, day))
+
+
+def _refresh(db: Session) -> DemandModel:
+    global _model
+    day = datetime.utcnow().date()
+    cursor = head_seq(db) # read first: anything committed after this is replayed next time
+    model = _model
+    if model is None or model.day != day or cursor_is_stale(db, model.cursor):
+        _model = _full_load(db, day, cursor)
+        return _model
+    if cursor == model.cursor:
+        return model
+
+    changed = sorted(
+        entity_id for (entity_id,) in db.query(ChangeLog.entity_id)
+        .filter(ChangeLog.seq > model.cursor, ChangeLog.seq <= cursor, ChangeLog.entity == "product")
+        .distinct()
+    )
+    if not changed:
+        model.cursor = cursor
+        return model
+    if len(changed) > PARTIAL_REFRESH_RATIO * len(model.product_ids):
+        _model = _full_load(db, day, cursor)
+        return _model
+
+    product_ids, names, stock = _load_products(db, changed)
+    rows = np.searchsorted(model.product_ids, product_ids)
+    if len(product_ids) != len(changed) or not np.array_equal(model.product_ids[np.minimum(rows, len(model.product_ids) - 1)], product_ids):
+        # A product was created or deleted; the catalogue itself changed
+        _model = _full_load(db, day, cursor)
+        return _model
+    demand = _load_demand(db, product_ids, day, changed)
+    model.stock[rows] = stock
+    model.demand[rows] = demand
+    model.mean[rows] = demand.mean(axis=1)
+    model.std[rows] = demand.std(axis=1)
+    for row, name in zip(rows, names):
+        model.names[row] = name
+    model.cursor = cursor
+    return model
+
+
+def replenishment_plan(db: Session, lead_time_days: float | None = None, cover_days: float | None = None, reorder_only: bool = False, limit: int | None = None) -> list[dict]:
+    """Days of cover, reorder point and suggested order quantity for every product, most urgent first.
+
+    reorder point = mean daily demand x lead time + z x std x sqrt(lead time)
+    (safety stock for REPLENISHMENT_SERVICE_Z), and a product that reaches it is
+    topped up to the reorder point plus `cover_days` of mean demand. Raises
+    ValueError for a non-positive lead time or negative cover.
+    """
+    lead_time_days = settings.replenishment_lead_time_days if lead_time_days is None else lead_time_days
+    cover_days = settings.replenishment_cover_days if cover_days is None else cover_days
+    if lead_time_days <= 0 or cover_days < 0:
+        raise ValueError("lead_time_days must be positive and cover_days not negative")
+
+    with _lock:
+        model = _refresh(db)
+        stock, mean, std = model.stock.copy(), model.mean.copy(), model.std.copy()
+        product_ids, names = model.product_ids, list(model.names)
+
+    reorder_point = mean * lead_time_days + settings.replenishment_service_z * std * math.sqrt(lead_time_days)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(mean > 0, stock / mean, np.inf)
+    needs_reorder = (mean > 0) & (stock <= reorder_point)
+    suggested = np.where(needs_reorder, np.ceil(np.maximum(reorder_point + mean * cover_days - stock, 0)), 0)
+
+    order = np.lexsort((product_ids, cover)) # fewest days of cover first
+    if reorder_only:
+        order = order[needs_reorder[order]]
+    if limit is not None:
+        order = order[:limit]
+    return [
+        {
+            "product_id": int(product_ids[i]),
+            "name": names[i],
+            "quantity_available": int(stock[i]),
+            "avg_daily_demand": round(float(mean[i]), 3),
+            "demand_std": round(float(std[i]), 3),
+            "days_of_cover": round(float(cover[i]), 1) if np.isfinite(cover[i]) else None,
+            "reorder_point": int(math.ceil(reorder_point[i])),
+            "suggested_order_quantity": int(suggested[i]),
+            "needs_reorder": bool(needs_reorder[i]),
+        }
+        for i in order.tolist()
+    ]
+
+
+def run_replenishment_plan(*args, **kwargs) -> list[dict]:
+    # For the async router; owns its session
+    db = SessionLocal()
+    try:
+        return replenishment_plan(db, *args, **kwargs)
+    finally:
+        db.close()
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import func
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ChangeLog
+from app.services.export_service import EXPORT_ENTITIES, export_statement, stream_chunks
+
+try:
+    from fpdf import FPDF
+except ImportError:
+    FPDF = None
+
+MAX_REPORT_ROWS = 100000 # beyond this a PDF stops being readable; use the CSV/Parquet exports
+ROW_HEIGHT = 7 # mm
+MARGIN = 10 # mm
+TABLE_TOP = 30 # mm, below the page header
+
+_pool = None
+_rendering = {} # artifact path -> future, so concurrent requests for one report render it once
+
+
+def dataset_version(entity: str) -> str:
+    """Changes when any row of `entity` changes: its newest change-log seq, plus the log's oldest
+    seq so a retention purge can't make an old version string reappear."""
+    db = SessionLocal()
+    try:
+        newest = db.query(func.max(ChangeLog.seq)).filter(ChangeLog.entity == entity.rstrip("s")).scalar()
+        oldest = db.query(func.min(ChangeLog.seq)).scalar()
+        return f"{newest or 0}-{oldest or 0}"
+    finally:
+        db.close()
+
+
+def artifact_path(entity: str, filters: dict, version: str) -> str:
+    key = repr((entity, sorted(filters.items()), version))
+    return os.path.join(settings.report_cache_dir, f"{entity}-{hashlib.sha256(key.encode()).hexdigest()[:24]}.pdf")
+
+
+def _cell_text(value, max_chars: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        text = value.strftime("%Y-%m-%d %H:%M")
+    elif isinstance(value, (Decimal, float)):
+        text = f"{value:.2f}"
+    else:
+        text = str(value)
+    if len(text) > max_chars:
+        text = text[:max_chars - 3] + "..."
+    # The core PDF fonts are latin-1 only
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def render_report(entity: str, filters: dict, path: str) -> int:
+    """Write the PDF table for `entity` to `path`. Runs in a worker process; returns the row count.
+
+    Rows are streamed from the database in chunks and laid out a page at a time:
+    the grid is drawn with one line per row and column boundary, then the text
+    is written one column at a time, instead of a bordered cell per value.
+    """
+    columns, stmt = export_statement(EXPORT_ENTITIES[entity], **filters)
+    names = [c.name for c in columns]
+    orientation = "L" if len(names) > 8 else "P"
+    pdf = FPDF(orientation=orientation)
+    pdf.set_auto_page_break(False)
+    page_width = pdf.w - 2 * MARGIN
+    col_width = page_width / len(names)
+    font_size = 10 if len(names) <= 8 else 7
+    # Average Helvetica glyph is ~0.5em wide; 1pt = 0.3528mm
+    max_chars = max(4, int((col_width - 2) / (font_size * 0.3528 * 0.55)))
+    rows_per_page = int((pdf.h - TABLE_TOP - 15) // ROW_HEIGHT) - 1 # minus the header row
+    title = f"{entity.capitalize()} Report"
+    subtitle = f"Generated {datetime.utcnow():%Y-%m-%d %H:%M} UTC" + "".join(f" | {k}={v}" for k, v in filters.items() if v is not None)
+    header = [_cell_text(n.upper(), max_chars) for n in names]
+
+    def emit_page(page_rows):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 15)
+        pdf.text(MARGIN, 18, title)
+        pdf.set_font("Arial", "", 8)
+        pdf.text(MARGIN, 24, subtitle)
+        pdf.text(pdf.w / 2 - 5, pdf.h - 8, f"Page {pdf.page_no()}")
+
+        lines = len(page_rows) + 1
+        bottom = TABLE_TOP + lines * ROW_HEIGHT
+        for i in range(lines + 1):
+            pdf.line(MARGIN, TABLE_TOP + i * ROW_HEIGHT, MARGIN + page_width, TABLE_TOP + i * ROW_HEIGHT)
+        for j in range(len(names) + 1):
+            pdf.line(MARGIN + j * col_width, TABLE_TOP, MARGIN + j * col_width, bottom)
+
+        baseline = ROW_HEIGHT * 0.7
+        pdf.set_font("Arial", "B", font_size)
+        for j, text in enumerate(header):
+            pdf.text(MARGIN + j * col_width + 1, TABLE_TOP + baseline, text)
+        pdf.set_font("Arial", "", font_size)
+        for j in range(len(names)):
+            x = MARGIN + j * col_width + 1
+            for i, text in enumerate(_cell_text(row[j], max_chars) for row in page_rows):
+                if text:
+                    pdf.text(x, TABLE_TOP + (i + 1) * ROW_HEIGHT + baseline, text)
+
+    pending = []
+    written = 0
+    for rows in stream_chunks(stmt):
+        rows = rows[:MAX_REPORT_ROWS - written]
+        pending.extend(rows)
+        written += len(rows)
+        while len(pending) >= rows_per_page:
+            emit_page(pending[:rows_per_page])
+            pending = pending[rows_per_page:]
+        if written >= MAX_REPORT_ROWS:
+            break
+    if pending or not written:
+        emit_page(pending)
+    if written >= MAX_REPORT_ROWS:
+        pdf.set_font("Arial", "I", 8)
+        pdf.text(MARGIN, pdf.h - 12, f"Truncated at {MAX_REPORT_ROWS} rows; download the CSV or Parquet export for the full data set.")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pdf.output(tmp_path)
+    os.replace(tmp_path, path) # readers never see a half-written file
+    return written
+
+
+def _prune_cache():
+    # Keep the newest artifacts; older versions of a report are never requested again
+    entries = sorted(
+        (e for e in os.scandir(settings.report_cache_dir) if e.name.endswith(".pdf")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in entries[settings.report_cache_max_files:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def _finished(path: str, future):
+    _rendering.pop(path, None)
+    if not future.cancelled() and future.exception() is None:
+        _prune_cache()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: workers open their own database connections instead of inheriting the parent's pool
+        _pool = ProcessPoolExecutor(max_workers=settings.report_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def build_report(entity: str, filters: dict, path: str):
+    """Render `path` in the process pool unless it is already there. Returns True on a cache hit."""
+    if os.path.exists(path):
+        return True
+    future = _rendering.get(path)
+    if future is None:
+        os.makedirs(settings.report_cache_dir, exist_ok=True)
+        future = get_pool().submit(render_report, entity, filters, path)
+        _rendering[path] = future
+        future.add_done_callback(lambda f: _finished(path, f))
+    try:
+        await asyncio.shield(asyncio.wrap_future(future))
+    except BrokenProcessPool:
+        shutdown_pool() # a worker died (OOM, killed); start a fresh pool for the next request
+        raise
+    return False
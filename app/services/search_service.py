@@ -0,0 +1,116 @@
+import logging
+import re
+from sqlalchemy import inspect, text
+from app.models import Product, Supplier
+
+logger = logging.getLogger(__name__)
+
+# Full-text indexes for the typeahead pickers. create_all can't declare them, so
+# install_search_indexes creates them on start:
+#   SQLite -> an FTS5 table per entity over the base table (external content),
+#             kept in sync by triggers that only fire when an indexed column changes
+#   MySQL  -> a FULLTEXT index on the base table
+# Anything else (or SQLite built without FTS5) falls back to a name prefix LIKE.
+
+SEARCH_ENTITIES = {
+    # entity -> (model, primary key, indexed columns, compact result columns)
+    "products": (Product, "product_id", ("name", "description"), ("product_id", "name", "quantity_available")),
+    "suppliers": (Supplier, "supplier_id", ("name", "contact_person", "address"), ("supplier_id", "name")),
+}
+MAX_SEARCH_RESULTS = 50
+MYSQL_MIN_TOKEN = 3 # innodb_ft_min_token_size; shorter words are not in the index
+
+_backend = {} # entity -> "fts5" / "fulltext" / "like"
+
+
+def _sqlite_fts(conn, model, pk: str, columns: tuple):
+    table = model.__tablename__
+    fts = f"{table}_fts"
+    existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": fts}).first() is not None
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='{pk}', prefix='2 3')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); END"
+    ))
+    # UPDATE OF: stock updates on every order don't touch the index
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END"
+    ))
+    if not existed:
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")) # index rows that predate it
+
+
+def _mysql_fulltext(conn, model, pk: str, columns: tuple):
+    table = model.__tablename__
+    name = f"ft_{table}_search"
+    if name not in {ix["name"] for ix in inspect(conn).get_indexes(table)}:
+        logger.info("creating FULLTEXT index %s; this reads the whole %s table once", name, table)
+        conn.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({', '.join(columns)})"))
+
+
+def install_search_indexes(engine):
+    """Create the full-text indexes this dialect supports and remember which search each entity uses."""
+    installers = {"sqlite": (_sqlite_fts, "fts5"), "mysql": (_mysql_fulltext, "fulltext"), "mariadb": (_mysql_fulltext, "fulltext")}
+    installer, backend = installers.get(engine.dialect.name, (None, "like"))
+    for entity, (model, pk, columns, _) in SEARCH_ENTITIES.items():
+        _backend[entity] = "like"
+        if installer is None:
+            continue
+        try:
+            with engine.begin() as conn:
+                installer(conn, model, pk, columns)
+            _backend[entity] = backend
+        except Exception:
+            logger.exception("full-text index for %s unavailable; falling back to prefix search on name", entity)
+
+
+def _tokens(q: str) -> list[str]:
+    return re.findall(r"\w+", q.lower())[:8]
+
+
+def search_statement(entity: str, q: str, limit: int):
+    """SELECT of compact result tuples matching `q`, best first, or None when `q` has no words.
+
+    Every word in `q` must match the start of a word in one of the indexed
+    columns, so "blu wid" finds "Blue Widget".
+    """
+    model, pk, columns, result = SEARCH_ENTITIES[entity]
+    table = model.__tablename__
+    tokens = _tokens(q)
+    if not tokens:
+        return None
+    select_cols = ", ".join(f"t.{c}" for c in result)
+    backend = _backend.get(entity, "like")
+    if backend == "fulltext":
+        tokens = [t for t in tokens if len(t) >= MYSQL_MIN_TOKEN]
+        if not tokens:
+            backend = "like" # only short words; the FULLTEXT index has none of them
+    params = {"limit": limit}
+
+    if backend == "fts5":
+        # Weighted so a hit in the name ranks above one in the other columns
+        params["q"] = " ".join(f'"{t}"*' for t in tokens)
+        weights = ", ".join(["10.0"] + ["1.0"] * (len(columns) - 1))
+        sql = (
+            f"SELECT {select_cols} FROM {table}_fts JOIN {table} t ON t.{pk} = {table}_fts.rowid "
+            f"WHERE {table}_fts MATCH :q ORDER BY bm25({table}_fts, {weights}), t.{pk} LIMIT :limit"
+        )
+    elif backend == "fulltext":
+        params["q"] = " ".join(f"+{t}*" for t in tokens)
+        match = f"MATCH({', '.join(f't.{c}' for c in columns)}) AGAINST (:q IN BOOLEAN MODE)"
+        sql = f"SELECT {select_cols} FROM {table} t WHERE {match} ORDER BY {match} DESC, t.{pk} LIMIT :limit"
+    else:
+        params["q"] = q.strip().replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+        sql = f"SELECT {select_cols} FROM {table} t WHERE t.name LIKE :q ESCAPE '!' ORDER BY t.name, t.{pk} LIMIT :limit"
+    return text(sql).bindparams(**params)
@@ -0,0 +1,183 @@
+from app.models import Order, Shipment, Supplier
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session, selectinload
+from datetime import datetime
+from app.services.delivery_service import delivery_state, bump_rollup
+from app.services.changes import record_changes
+from app.services.analytics_service import bump_shipment_stats
+
+# Shipmentout.order_ids walks Shipment.orders; load just the ids for a whole page in one
+# extra SELECT ... WHERE shipment_id IN (...) instead of one lazy load per shipment
+with_order_ids = selectinload(Shipment.orders).load_only(Order.order_id)
+
+
+def pack_orders(orders: list, capacity: float) -> list[list]:
+    """Bin-cover `(order_id, volume)` pairs into groups whose volume reaches `capacity`.
+
+    Sorted once, then each bin is seeded with the largest remaining order and topped
+    up with the smallest ones, which keeps overshoot low. Orders that cannot fill a
+    whole bin are left out so they stay Pending for a later run.
+    """
+    if capacity <= 0:
+        return [list(orders)] if orders else []
+
+    items = sorted(orders, key=lambda o: o[1], reverse=True)
+    bins = []
+    lo, hi = 0, len(items) - 1
+    while lo <= hi:
+        current = [items[lo]]
+        load = items[lo][1]
+        lo += 1
+        while load < capacity and lo <= hi:
+            current.append(items[hi])
+            load += items[hi][1]
+            hi -= 1
+        if load >= capacity:
+            bins.append(current)
+    return bins
+
+
+def top_up_waiting_shipments(db: Session, orders: list) -> list[int]:
+    """Attach new, not yet flushed Order objects to their supplier's open Waiting shipment.
+
+    Runs in the caller's transaction before the orders are inserted, so they go in
+    with shipment_id and status already set. Only the shipments of the suppliers in
+    the batch are read (status index), and the load is added on top of the stored
+    current_load. A shipment that reaches required_capacity is promoted to Planning
+    and later orders in the batch stay Pending for auto-consolidation. Returns the
+    ids of promoted shipments.
+    """
+    supplier_ids = {o.supplier_id for o in orders}
+    if not supplier_ids:
+        return []
+
+    open_shipments = {}
+    for shipment, sup_id in (
+        db.query(Shipment, Order.supplier_id)
+        .join(Order, Order.order_id == Shipment.order_id)
+        .filter(Shipment.status == "Waiting", Order.supplier_id.in_(supplier_ids))
+        .order_by(Shipment.shipment_id)
+        .with_for_update()
+    ):
+        open_shipments.setdefault(sup_id, shipment) # oldest Waiting shipment per supplier
+    if not open_shipments:
+        return []
+
+    attached = {}
+    promoted = []
+    for o in orders:
+        shipment = open_shipments.get(o.supplier_id)
+        if shipment is None:
+            continue
+        capacity = float(shipment.required_capacity or 0)
+        load = float(shipment.current_load or 0) + float(o.total_volume or 0)
+        shipment.current_load = load
+        shipment.load_percentage = min(load / capacity * 100, 999.99) if capacity > 0 else 100
+        o.shipment_id = shipment.shipment_id
+        o.status = "Waiting"
+        attached.setdefault(shipment.shipment_id, []).append(o)
+        if load >= capacity:
+            shipment.status = "Planning"
+            bump_shipment_stats(db, [(shipment.shipment_date, "Waiting", -1), (shipment.shipment_date, "Planning", 1)])
+            promoted.append(shipment.shipment_id)
+            del open_shipments[o.supplier_id]
+
+    if promoted:
+        # Orders that were already waiting on a promoted shipment are now scheduled with it
+        waiting = db.query(Order).filter(Order.shipment_id.in_(promoted), Order.status == "Waiting")
+        record_changes(db, "order", [order_id for (order_id,) in waiting.with_entities(Order.order_id)])
+        waiting.update({Order.status: "Scheduled"}, synchronize_session=False)
+        for shipment_id in promoted:
+            for o in attached[shipment_id]:
+                o.status = "Scheduled"
+    return promoted
+
+
+def auto_consolidate(db: Session, shipment_date: datetime, estimated_arrival_date: datetime, supplier_id: int | None = None) -> list[dict]:
+    query = db.query(Order.order_id, Order.supplier_id, Order.total_volume).filter(
+        Order.status == "Pending",
+        Order.shipment_id == None,
+    )
+    if supplier_id is not None:
+        query = query.filter(Order.supplier_id == supplier_id)
+
+    by_supplier = {}
+    for order_id, sup_id, volume in query.with_for_update().all():
+        by_supplier.setdefault(sup_id, []).append((order_id, float(volume or 0)))
+    if not by_supplier:
+        return []
+
+    capacities = {
+        s.supplier_id: float(s.min_capacity) if s.min_capacity else 0.0
+        for s in db.query(Supplier.supplier_id, Supplier.min_capacity).filter(Supplier.supplier_id.in_(by_supplier))
+    }
+
+    state = delivery_state(estimated_arrival_date, None)
+    planned = []
+    for sup_id, orders in by_supplier.items():
+        min_cap = capacities.get(sup_id, 0.0)
+        for group in pack_orders(orders, min_cap):
+            load = sum(volume for _, volume in group)
+            row = {
+                "order_id": group[0][0], # Link primary order for legacy ref
+                "shipment_date": shipment_date,
+                "estimated_arrival_date": estimated_arrival_date,
+                "status": "Planning",
+                "required_capacity": min_cap,
+                "current_load": load,
+                "load_percentage": min(load / min_cap * 100, 999.99) if min_cap > 0 else 100,
+                "priority": "normal",
+                "extra_charge": 0.0,
+                "total_cost": 0.0,
+                "delivery_state": state,
+            }
+            planned.append((sup_id, group, row))
+    if not planned:
+        return []
+
+    rows = [row for _, _, row in planned]
+    conn = db.connection()
+    if conn.dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(Shipment).returning(Shipment.shipment_id, sort_by_parameter_order=True)
+        shipment_ids = conn.execute(stmt, rows).scalars().all()
+    else:
+        # e.g. MySQL: no RETURNING, fall back to one INSERT per shipment in the same transaction
+        shipment_ids = [conn.execute(insert(Shipment).values(**row)).inserted_primary_key[0] for row in rows]
+    for row, shipment_id in zip(rows, shipment_ids):
+        row["shipment_id"] = shipment_id
+
+    stmt = (
+        update(Order)
+        .where(Order.order_id == bindparam("oid"), Order.status == "Pending")
+        .values(shipment_id=bindparam("sid"), status="Scheduled")
+    )
+    params = [
+        {"oid": order_id, "sid": row["shipment_id"]}
+        for _, group, row in planned
+        for order_id, _ in group
+    ]
+    updated = conn.execute(stmt, params)
+    if updated.rowcount not in (-1, len(params)):
+        db.rollback()
+        raise RuntimeError("Pending orders changed during consolidation")
+    record_changes(db, "shipment", [row["shipment_id"] for row in rows], op="insert")
+    bump_shipment_stats(db, [(shipment_date, "Planning", len(rows))])
+    record_changes(db, "order", [p["oid"] for p in params])
+
+    per_supplier = {}
+    for sup_id, _, _ in planned:
+        per_supplier[sup_id] = per_supplier.get(sup_id, 0) + 1
+    for sup_id, count in per_supplier.items():
+        bump_rollup(db, sup_id, {state: count})
+    db.commit()
+
+    return [
+        {
+            "shipment_id": row["shipment_id"],
+            "supplier_id": sup_id,
+            "order_ids": [order_id for order_id, _ in group],
+            "current_load": row["current_load"],
+            "load_percentage": row["load_percentage"],
+        }
+        for sup_id, group, row in planned
+    ]
@@ -0,0 +1,40 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Order, Product, Shipment, Supplier
+
+# Whole-table dashboard totals (row counts and stock value) are O(rows) to compute.
+# A background job in main recomputes them every STATS_REFRESH_SECONDS and requests
+# read the last snapshot. Per-write counters would put a single hot row in front of
+# every order.
+
+_totals = None # last computed snapshot, shared by the worker's threads
+
+
+def compute_totals(db: Session) -> dict:
+    stock_value, products = db.query(
+        func.coalesce(func.sum(Product.unit_price * Product.quantity_available), 0),
+        func.count(Product.product_id),
+    ).one()
+    return {
+        "products": products,
+        "orders": db.query(func.count(Order.order_id)).scalar(),
+        "shipments": db.query(func.count(Shipment.shipment_id)).scalar(),
+        "suppliers": db.query(func.count(Supplier.supplier_id)).scalar(),
+        "stock_value": float(stock_value),
+    }
+
+
+def refresh_totals():
+    # Entry point for the background loop in main; owns its session
+    global _totals
+    db = SessionLocal()
+    try:
+        _totals = compute_totals(db)
+    finally:
+        db.close()
+
+
+def current_totals(db: Session) -> dict:
+    """The last background snapshot, or a fresh computation before the first one (or with refreshing disabled)."""
+    return _totals if _totals is not None else compute_totals(db)
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+
+
+def upsert_add(db: Session, model, keys: tuple, columns: tuple, rows: list[dict]):
+    """Insert `rows`, or add their `columns` onto the existing row with the same `keys`, in one statement per row."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(model)
+        stmt = stmt.on_duplicate_key_update({c: getattr(model, c) + stmt.inserted[c] for c in columns})
+    else:
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model)
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_={c: getattr(model, c) + stmt.excluded[c] for c in columns})
+    db.connection().execute(stmt, rows)
@@ -0,0 +1,125 @@
+"""Payload size and end-to-end load time of the response formats, into a pandas DataFrame.
+
+    python -m benchmarks.generate --orders 1000000
+    python -m benchmarks.formats --db benchmarks/data/bench_1000000.db
+
+Each case downloads the same rows and loads them into a DataFrame, so the times
+cover the server encoding, the transfer and the client parsing. Exports stream the
+whole table; list pages are 1000 rows (MAX_PAGE_SIZE) and repeated.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.run import start_server
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def from_json(content: bytes) -> pd.DataFrame:
+    return pd.DataFrame(json.loads(content))
+
+
+def from_ndjson(content: bytes) -> pd.DataFrame:
+    return pd.read_json(io.BytesIO(content), lines=True)
+
+
+def from_arrow(content: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(content).read_pandas()
+
+
+def from_csv(content: bytes) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(content))
+
+
+def from_parquet(content: bytes) -> pd.DataFrame:
+    return pd.read_parquet(io.BytesIO(content))
+
+
+# (label, url, request kwargs, loader); one set for whole-table exports, one for list pages
+EXPORTS = [
+    ("ndjson export", "/exports/orders.ndjson", {}, from_ndjson),
+    ("csv export", "/exports/orders.csv", {}, from_csv),
+    ("parquet export", "/exports/orders.parquet", {}, from_parquet),
+    ("arrow export", "/exports/orders.arrow", {}, from_arrow),
+]
+PAGES = [
+    ("json page", "/orders/", {"params": {"limit": 1000}}, from_json),
+    ("json page fields=all", "/orders/", {"params": {"limit": 1000, "fields": "order_id,product_id,supplier_id,order_date,quantity_ordered,total_volume,status,shipment_id"}}, from_json),
+    ("arrow page", "/orders/", {"params": {"limit": 1000}, "headers": {"Accept": ARROW_STREAM}}, from_arrow),
+]
+
+
+def measure(client: httpx.Client, label, url, kwargs, loader, repeat: int) -> dict:
+    times, download_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, **kwargs).raise_for_status()
+        downloaded = time.perf_counter()
+        frame = loader(response.content)
+        done = time.perf_counter()
+        download_times.append(downloaded - start)
+        times.append(done - start)
+    return {
+        "case": label,
+        "rows": len(frame),
+        "bytes": len(response.content),
+        "download_s": statistics.median(download_times),
+        "total_s": statistics.median(times),
+    }
+
+
+def print_table(results: list[dict]):
+    header = f"{'case':<24} {'rows':>9} {'MB':>9} {'download s':>11} {'to pandas s':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['case']:<24} {r['rows']:>9} {r['bytes'] / 1e6:>9.2f} {r['download_s']:>11.3f} {r['total_s']:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON, CSV, Parquet and Arrow payloads loaded into pandas")
+    parser.add_argument("--db", help="dataset from benchmarks.generate (copied before the run)")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--export-repeat", type=int, default=3)
+    parser.add_argument("--page-repeat", type=int, default=50)
+    args = parser.parse_args()
+    if not args.url and not args.db:
+        parser.error("either --db or --url is required")
+
+    server = scratch = None
+    url = args.url
+    try:
+        if not url:
+            scratch = tempfile.mkdtemp(prefix="bench-")
+            db_copy = os.path.join(scratch, "bench.db")
+            shutil.copyfile(args.db, db_copy)
+            server, url = start_server(db_copy, "sync", args.port, 1)
+        with httpx.Client(base_url=url, timeout=600) as client:
+            pages = [measure(client, *case, repeat=args.page_repeat) for case in PAGES]
+            exports = [measure(client, *case, repeat=args.export_repeat) for case in EXPORTS]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\nlist pages (median of {args.page_repeat})\n")
+    print_table(pages)
+    print(f"\nwhole-table exports (median of {args.export_repeat})\n")
+    print_table(exports)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Seeded synthetic dataset for benchmarks.
+
+    python -m benchmarks.generate --orders 100000 --db benchmarks/data/bench_100k.db
+
+The same --seed and --orders always produce the same database. Suppliers and
+products scale with the order count and popularity is skewed, so a few hot
+SKUs and suppliers take most of the orders. Orders older than --pending-days
+are consolidated into shipments per supplier, filled up to the supplier's
+min_capacity the same way auto-consolidation does; the rest stay Pending.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("APP_ENV", "local")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.schema import CreateIndex, CreateTable  # noqa: E402
+from app.database import Base  # noqa: E402
+import app.models  # noqa: E402,F401  (registers the tables on Base.metadata)
+from app.services.analytics_service import rebuild_analytics  # noqa: E402
+from app.services.search_service import install_search_indexes  # noqa: E402
+
+BATCH_SIZE = 50_000
+
+ORDER_COLUMNS = ("order_id", "product_id", "supplier_id", "order_date", "quantity_ordered", "total_volume", "shipment_id", "status")
+SHIPMENT_COLUMNS = (
+    "shipment_id", "order_id", "shipment_date", "estimated_arrival_date", "status", "actual_arrival_date",
+    "required_capacity", "current_load", "load_percentage", "priority", "extra_charge", "total_cost", "cost_reason",
+)
+
+CITIES = ["Chennai", "Mumbai", "Delhi", "Pune", "Kolkata", "Hyderabad", "Bengaluru", "Ahmedabad", "Jaipur", "Kochi"]
+PRODUCT_WORDS = ["Steel", "Copper", "Cotton", "Plastic", "Glass", "Paper", "Rubber", "Ceramic", "Timber", "Nylon"]
+PRODUCT_KINDS = ["Sheet", "Coil", "Pellet", "Crate", "Pipe", "Roll", "Panel", "Drum", "Bolt", "Fabric"]
+
+
+def _ts(value: datetime | None):
+    # SQLAlchemy's SQLite DateTime text format, so range filters compare like app-written rows
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f") if value is not None else None
+
+
+def skewed(rng: random.Random, n: int, skew: float = 2.0) -> int:
+    # 1-based id where low ids are much more popular (roughly 20% of ids get ~55% of picks at skew=2)
+    return int(n * rng.random() ** skew) + 1
+
+
+def make_suppliers(rng: random.Random, count: int) -> list[dict]:
+    return [
+        {
+            "supplier_id": i,
+            "name": f"{rng.choice(CITIES)} Supply Co {i}",
+            "address": f"{rng.randint(1, 999)} Industrial Estate, {rng.choice(CITIES)}",
+            "contact_person": f"Contact {i}",
+            "phone_number": f"+91{rng.randint(7000000000, 9999999999)}",
+            "min_capacity": round(rng.uniform(50, 400), 2),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def make_products(rng: random.Random, count: int, orders: int) -> list[dict]:
+    # Enough stock that the load driver's writes rarely run a hot product dry
+    stock = max(10_000, orders * 10 // count)
+    return [
+        {
+            "product_id": i,
+            "name": f"{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_KINDS)} {i}",
+            "description": f"Synthetic product {i}",
+            "unit_price": round(rng.uniform(1, 500), 2),
+            "quantity_available": rng.randint(stock // 2, stock),
+            "volume_per_unit": round(rng.uniform(0.1, 5.0), 2),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+class ShipmentBuilder:
+    """Fills one open shipment per supplier and closes it once min_capacity is reached."""
+
+    def __init__(self, rng: random.Random, suppliers: list[dict], now: datetime):
+        self.rng = rng
+        self.capacity = {s["supplier_id"]: s["min_capacity"] for s in suppliers}
+        self.now = now
+        self.open = {} # supplier_id -> [shipment_id, first_order_id, load, last_order_date]
+        self.next_id = 1
+        self.closed = []
+
+    def assign(self, order_id: int, supplier_id: int, volume: float, order_date: datetime) -> int:
+        current = self.open.get(supplier_id)
+        if current is None:
+            current = self.open[supplier_id] = [self.next_id, order_id, 0.0, order_date]
+            self.next_id += 1
+        current[2] += volume
+        current[3] = order_date
+        if current[2] >= self.capacity[supplier_id]:
+            self.closed.append(self._row(supplier_id, *self.open.pop(supplier_id)))
+        return current[0]
+
+    def flush_open(self) -> list[dict]:
+        # Shipments that never reached capacity: still Waiting for more orders
+        rows = [self._row(sid, *state, waiting=True) for sid, state in self.open.items()]
+        self.open.clear()
+        return rows
+
+    def drain(self) -> list[dict]:
+        rows, self.closed = self.closed, []
+        return rows
+
+    def _row(self, supplier_id, shipment_id, order_id, load, shipped_on, waiting=False) -> dict:
+        capacity = self.capacity[supplier_id]
+        eta = shipped_on + timedelta(days=self.rng.randint(2, 10))
+        actual = None
+        if waiting:
+            status = "Waiting"
+        elif eta < self.now:
+            # ~15% arrive late
+            actual = eta + timedelta(hours=self.rng.randint(-48, 6) if self.rng.random() > 0.15 else self.rng.randint(12, 120))
+            status = "Delivered" if actual <= self.now else "In Transit"
+            if actual > self.now:
+                actual = None
+        else:
+            status = self.rng.choice(["Planning", "In Transit"])
+        return {
+            "shipment_id": shipment_id,
+            "order_id": order_id,
+            "shipment_date": _ts(shipped_on),
+            "estimated_arrival_date": _ts(eta),
+            "status": status,
+            "actual_arrival_date": _ts(actual),
+            "required_capacity": capacity,
+            "current_load": round(load, 2),
+            "load_percentage": round(min(load / capacity * 100, 999.99), 2),
+            "priority": "urgent" if self.rng.random() < 0.05 else "normal",
+            "extra_charge": 0.0,
+            "total_cost": 0.0,
+            "cost_reason": None,
+        }
+
+
+def generate(db_path: str, orders: int, seed: int = 42, days: int = 365, pending_days: int = 3, suppliers: int | None = None, products: int | None = None):
+    rng = random.Random(seed)
+    supplier_count = suppliers or max(10, orders // 1000)
+    product_count = products or max(20, orders // 200)
+    now = datetime(2026, 1, 1) # fixed so a seed always yields the same dataset
+    start = now - timedelta(days=days)
+    pending_after = now - timedelta(days=pending_days)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    # Tables first, indexes after the bulk load: building an index once is far
+    # cheaper than maintaining it across millions of inserts
+    engine = create_engine(f"sqlite:///{db_path}")
+    tables = list(Base.metadata.tables.values()) # orders <-> shipment FKs form a cycle, so no sorted order
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(CreateTable(table))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    def insert(table: str, columns, rows: list[dict]):
+        if rows:
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            conn.executemany(sql, [tuple(r[c] for c in columns) for r in rows])
+
+    supplier_rows = make_suppliers(rng, supplier_count)
+    product_rows = make_products(rng, product_count, orders)
+    insert("suppliers", tuple(supplier_rows[0]), supplier_rows)
+    insert("product", tuple(product_rows[0]), product_rows)
+    volumes = [p["volume_per_unit"] for p in product_rows]
+
+    builder = ShipmentBuilder(rng, supplier_rows, now)
+    step = (now - start) / orders
+    started = time.perf_counter()
+    batch = []
+    for order_id in range(1, orders + 1):
+        order_date = start + step * order_id
+        product_id = skewed(rng, product_count)
+        supplier_id = skewed(rng, supplier_count, 1.5)
+        quantity = rng.randint(1, 50)
+        volume = round(quantity * volumes[product_id - 1], 2)
+        if order_date < pending_after:
+            shipment_id = builder.assign(order_id, supplier_id, volume, order_date)
+            status = "Scheduled"
+        else:
+            shipment_id, status = None, "Pending"
+        batch.append((order_id, product_id, supplier_id, _ts(order_date), quantity, volume, shipment_id, status))
+
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(f"INSERT INTO orders ({', '.join(ORDER_COLUMNS)}) VALUES ({', '.join('?' * len(ORDER_COLUMNS))})", batch)
+            insert("shipment", SHIPMENT_COLUMNS, builder.drain())
+            batch = []
+    conn.executemany(f"INSERT INTO orders ({', '.join(ORDER_COLUMNS)}) VALUES ({', '.join('?' * len(ORDER_COLUMNS))})", batch)
+    insert("shipment", SHIPMENT_COLUMNS, builder.drain() + builder.flush_open())
+    conn.commit()
+
+    # Orders in a still-Waiting shipment are Waiting too, matching create_shipment
+    conn.execute(
+        "UPDATE orders SET status = 'Waiting' WHERE shipment_id IN (SELECT shipment_id FROM shipment WHERE status = 'Waiting')"
+    )
+    conn.commit()
+    loaded = time.perf_counter() - started
+    conn.close()
+
+    with engine.begin() as sa_conn:
+        for table in tables:
+            for index in table.indexes:
+                sa_conn.execute(CreateIndex(index))
+    # Build what the API would otherwise backfill on every start of a scratch copy
+    with Session(engine) as session:
+        rebuild_analytics(session)
+    install_search_indexes(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("ANALYZE")
+    shipments = conn.execute("SELECT count(*) FROM shipment").fetchone()[0]
+    conn.close()
+
+    return {
+        "db": db_path,
+        "seed": seed,
+        "suppliers": supplier_count,
+        "products": product_count,
+        "orders": orders,
+        "shipments": shipments,
+        "load_seconds": round(loaded, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded SQLite dataset for benchmarks")
+    parser.add_argument("--orders", type=int, default=10_000, help="number of orders (10k to 10M)")
+    parser.add_argument("--db", default=None, help="output path (default benchmarks/data/bench_<orders>.db)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=365, help="span of order dates")
+    parser.add_argument("--pending-days", type=int, default=3, help="orders newer than this stay Pending")
+    parser.add_argument("--suppliers", type=int, default=None)
+    parser.add_argument("--products", type=int, default=None)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join("benchmarks", "data", f"bench_{args.orders}.db")
+    summary = generate(db_path, args.orders, args.seed, args.days, args.pending_days, args.suppliers, args.products)
+    for key, value in summary.items():
+        print(f"{key:>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
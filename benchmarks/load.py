@@ -0,0 +1,233 @@
+"""Closed-loop load driver: N workers send a weighted mix of requests across every router.
+
+Each request is recorded under its route template (e.g. "GET /orders/{order_id}")
+so results stay comparable across runs and datasets.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.services.pagination import encode_cursor
+from benchmarks.generate import skewed
+
+PAGE = 50
+
+
+@dataclass
+class Dataset:
+    suppliers: int
+    products: int
+    orders: int
+    shipments: int
+    latest_order_date: datetime
+
+    @classmethod
+    async def discover(cls, client: httpx.AsyncClient) -> "Dataset":
+        summary = (await client.get("/stats/summary", params={"latest": 1})).raise_for_status().json()
+        latest = summary["latest_orders"][0]["order_date"] if summary["latest_orders"] else None
+        return cls(
+            suppliers=max(summary["suppliers"], 1),
+            products=max(summary["products"], 1),
+            orders=max(summary["orders"], 1),
+            shipments=max(summary["shipments"], 1),
+            latest_order_date=datetime.fromisoformat(latest) if latest else datetime.utcnow(),
+        )
+
+
+@dataclass
+class Results:
+    latencies: dict = field(default_factory=dict) # endpoint -> [seconds]
+    errors: dict = field(default_factory=dict) # endpoint -> {status: count}
+    elapsed: float = 0.0
+
+    def record(self, endpoint: str, seconds: float, status: int):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if status >= 400:
+            counts = self.errors.setdefault(endpoint, {})
+            counts[status] = counts.get(status, 0) + 1
+
+
+# Each scenario returns (endpoint label, method, url, request kwargs).
+# Ids are drawn with the same skew as the generator, so hot rows stay hot.
+
+def get_product(rng, d):
+    return "GET /products/{product_id}", "GET", f"/products/{skewed(rng, d.products)}", {}
+
+def list_products(rng, d):
+    return "GET /products/", "GET", "/products/", {"params": {"limit": PAGE}}
+
+def low_stock(rng, d):
+    return "GET /products/low-stock", "GET", "/products/low-stock", {"params": {"threshold": 100, "limit": PAGE}}
+
+def list_suppliers(rng, d):
+    return "GET /suppliers/", "GET", "/suppliers/", {"params": {"limit": PAGE}}
+
+def get_supplier(rng, d):
+    return "GET /suppliers/{supplier_id}", "GET", f"/suppliers/{skewed(rng, d.suppliers, 1.5)}", {}
+
+def supplier_orders(rng, d):
+    return "GET /suppliers/{supplier_id}/orders", "GET", f"/suppliers/{skewed(rng, d.suppliers, 1.5)}/orders", {"params": {"limit": PAGE}}
+
+def supplier_shipments(rng, d):
+    return "GET /suppliers/{supplier_id}/shipments", "GET", f"/suppliers/{skewed(rng, d.suppliers, 1.5)}/shipments", {"params": {"limit": PAGE}}
+
+def list_orders(rng, d):
+    params = {"limit": PAGE}
+    if rng.random() < 0.5:
+        params["status"] = "Pending"
+    return "GET /orders/", "GET", "/orders/", {"params": params}
+
+def get_order(rng, d):
+    # Recent orders are read far more often than old ones
+    return "GET /orders/{order_id}", "GET", f"/orders/{d.orders - skewed(rng, d.orders, 3) + 1}", {}
+
+def orders_by_date(rng, d):
+    end = d.latest_order_date - timedelta(days=rng.randint(0, 300))
+    params = {"start_date": (end - timedelta(days=1)).isoformat(), "end_date": end.isoformat(), "limit": PAGE}
+    return "GET /orders/date-range", "GET", "/orders/date-range", {"params": params}
+
+def orders_by_product(rng, d):
+    return "GET /orders/product/{product_id}", "GET", f"/orders/product/{skewed(rng, d.products)}", {"params": {"limit": PAGE}}
+
+def orders_by_supplier(rng, d):
+    return "GET /orders/supplier/{supplier_id}", "GET", f"/orders/supplier/{skewed(rng, d.suppliers, 1.5)}", {"params": {"limit": PAGE}}
+
+def list_shipments(rng, d):
+    return "GET /shipments/", "GET", "/shipments/", {"params": {"limit": PAGE}}
+
+def get_shipment(rng, d):
+    return "GET /shipments/{shipment_id}", "GET", f"/shipments/{rng.randint(1, d.shipments)}", {}
+
+def delayed_shipments(rng, d):
+    return "GET /shipments/delayed", "GET", "/shipments/delayed", {"params": {"limit": PAGE}}
+
+def ontime_shipments(rng, d):
+    return "GET /shipments/on-time", "GET", "/shipments/on-time", {"params": {"limit": PAGE}}
+
+def shipments_by_order(rng, d):
+    return "GET /shipments/order/{order_id}", "GET", f"/shipments/order/{rng.randint(1, d.orders)}", {"params": {"limit": PAGE}}
+
+def stats_summary(rng, d):
+    return "GET /stats/summary", "GET", "/stats/summary", {}
+
+def export_orders(rng, d):
+    params = {"supplier_id": skewed(rng, d.suppliers, 1.5), "start_date": (d.latest_order_date - timedelta(days=7)).isoformat()}
+    return "GET /exports/{entity}.{fmt}", "GET", "/exports/orders.csv", {"params": params}
+
+# Full pages for the "payload" mix: the same rows through the orm_mode schemas and through ?fields=
+BIG_PAGE = 1000
+ORDER_FIELDS = "product_id,supplier_id,order_date,quantity_ordered,order_id,total_volume,status,shipment_id"
+SHIPMENT_FIELDS = "shipment_id,order_id,shipment_date,estimated_arrival_date,status,priority,current_load,load_percentage"
+
+def _big_page(rng, total: int, **params) -> dict:
+    start = rng.randint(0, max(total - BIG_PAGE, 0))
+    return {"params": {"limit": BIG_PAGE, "cursor": encode_cursor([start]), **params}}
+
+def order_page(rng, d):
+    return "GET /orders/ x1000", "GET", "/orders/", _big_page(rng, d.orders)
+
+def order_page_all_fields(rng, d):
+    return "GET /orders/ x1000 fields=all", "GET", "/orders/", _big_page(rng, d.orders, fields=ORDER_FIELDS)
+
+def order_page_three_fields(rng, d):
+    return "GET /orders/ x1000 fields=3", "GET", "/orders/", _big_page(rng, d.orders, fields="order_id,status,total_volume")
+
+def shipment_page(rng, d):
+    return "GET /shipments/ x1000", "GET", "/shipments/", _big_page(rng, d.shipments)
+
+def shipment_page_fields(rng, d):
+    return "GET /shipments/ x1000 fields=8", "GET", "/shipments/", _big_page(rng, d.shipments, fields=SHIPMENT_FIELDS)
+
+def create_order(rng, d):
+    body = {"product_id": skewed(rng, d.products), "supplier_id": skewed(rng, d.suppliers, 1.5), "quantity_ordered": rng.randint(1, 20)}
+    return "POST /orders/", "POST", "/orders/", {"json": body}
+
+def bulk_orders(rng, d):
+    body = [
+        {"product_id": skewed(rng, d.products), "supplier_id": skewed(rng, d.suppliers, 1.5), "quantity_ordered": rng.randint(1, 20)}
+        for _ in range(50)
+    ]
+    return "POST /orders/bulk", "POST", "/orders/bulk", {"json": body}
+
+def adjust_stock(rng, d):
+    return "PUT /products/{product_id}/adjust-stock", "PUT", f"/products/{skewed(rng, d.products)}/adjust-stock", {"params": {"amount": rng.randint(20, 200)}}
+
+def update_shipment(rng, d):
+    body = {"status": rng.choice(["Planning", "In Transit", "Delivered"])}
+    return "PUT /shipments/{shipment_id}", "PUT", f"/shipments/{d.shipments - skewed(rng, d.shipments, 3) + 1}", {"json": body}
+
+def record_arrival(rng, d):
+    params = {"actual_arrival_date": (d.latest_order_date + timedelta(hours=rng.randint(0, 240))).isoformat()}
+    return "PUT /shipments/{shipment_id}/arrival", "PUT", f"/shipments/{d.shipments - skewed(rng, d.shipments, 3) + 1}/arrival", {"params": params}
+
+def auto_consolidate(rng, d):
+    body = {"estimated_arrival_date": (d.latest_order_date + timedelta(days=5)).isoformat(), "supplier_id": skewed(rng, d.suppliers, 1.5)}
+    return "POST /shipments/auto-consolidate", "POST", "/shipments/auto-consolidate", {"json": body}
+
+def create_supplier(rng, d):
+    body = {"name": f"Bench Supplier {rng.randint(1, 10**9)}", "address": "Benchmark Park", "min_capacity": 100}
+    return "POST /suppliers/", "POST", "/suppliers/", {"json": body}
+
+
+# (scenario, weight): roughly 85% reads / 15% writes, dominated by point lookups
+MIXES = {
+    "default": [
+        (get_product, 12), (list_products, 3), (low_stock, 2),
+        (list_suppliers, 2), (get_supplier, 5), (supplier_orders, 4), (supplier_shipments, 3),
+        (list_orders, 5), (get_order, 10), (orders_by_date, 4), (orders_by_product, 4), (orders_by_supplier, 4),
+        (list_shipments, 3), (get_shipment, 6), (delayed_shipments, 3), (ontime_shipments, 2), (shipments_by_order, 2),
+        (stats_summary, 3), (export_orders, 1),
+        (create_order, 7), (bulk_orders, 1), (adjust_stock, 3),
+        (update_shipment, 2), (record_arrival, 1), (auto_consolidate, 1), (create_supplier, 1),
+    ],
+    "read-only": [
+        (get_product, 12), (list_products, 3), (get_supplier, 5), (supplier_orders, 4),
+        (list_orders, 5), (get_order, 10), (orders_by_date, 4), (orders_by_supplier, 4),
+        (list_shipments, 3), (get_shipment, 6), (delayed_shipments, 3), (stats_summary, 3),
+    ],
+    "payload": [
+        (order_page, 1), (order_page_all_fields, 1), (order_page_three_fields, 1),
+        (shipment_page, 1), (shipment_page_fields, 1),
+    ],
+    "write-heavy": [
+        (get_product, 6), (get_order, 6), (get_shipment, 3),
+        (create_order, 20), (bulk_orders, 2), (adjust_stock, 8), (update_shipment, 4), (auto_consolidate, 1),
+    ],
+}
+
+
+async def run_load(base_url: str, duration: float, concurrency: int, mix: str = "default", seed: int = 42, warmup: float = 2.0) -> Results:
+    scenarios, weights = zip(*MIXES[mix])
+    results = Results()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        dataset = await Dataset.discover(client)
+        recording = False
+
+        async def worker(worker_id: int, deadline: float):
+            rng = random.Random(seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                endpoint, method, url, kwargs = rng.choices(scenarios, weights)[0](rng, dataset)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 599
+                if recording:
+                    results.record(endpoint, time.perf_counter() - start, status)
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+
+        recording = True
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(i, deadline) for i in range(concurrency)))
+        results.elapsed = time.perf_counter() - started
+    return results
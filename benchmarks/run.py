@@ -0,0 +1,184 @@
+"""Benchmark harness: run the load driver and compare against a saved baseline.
+
+    python -m benchmarks.generate --orders 100000
+    python -m benchmarks.run --db benchmarks/data/bench_100000.db --save baseline
+    # ...change something...
+    python -m benchmarks.run --db benchmarks/data/bench_100000.db --compare baseline
+
+Unless --url points at a running server, uvicorn is started against a scratch
+copy of --db (writes in the mix would otherwise drift the dataset between runs)
+with APP_ENV=local, in sync or async mode (--mode).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load import MIXES, run_load
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(results) -> dict:
+    endpoints = {}
+    total = 0
+    for endpoint, latencies in sorted(results.latencies.items()):
+        latencies.sort()
+        total += len(latencies)
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / results.elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "errors": sum(results.errors.get(endpoint, {}).values()),
+        }
+    every = sorted(x for latencies in results.latencies.values() for x in latencies)
+    overall = {
+        "requests": total,
+        "rps": round(total / results.elapsed, 2) if results.elapsed else 0.0,
+        "p50_ms": round(percentile(every, 50) * 1000, 2),
+        "p95_ms": round(percentile(every, 95) * 1000, 2),
+        "p99_ms": round(percentile(every, 99) * 1000, 2),
+        "errors": sum(sum(c.values()) for c in results.errors.values()),
+    }
+    return {"overall": overall, "endpoints": endpoints}
+
+
+def print_report(summary: dict, baseline: dict | None = None, threshold: float = 10.0) -> list[str]:
+    """Print a per-endpoint table; with a baseline, add p95/rps deltas and return regressions."""
+    regressions = []
+    header = f"{'endpoint':<44} {'req':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5}"
+    if baseline:
+        header += f" {'Δp95':>8} {'Δrps':>8}"
+    print(header)
+    print("-" * len(header))
+
+    rows = [*summary["endpoints"].items(), ("ALL", summary["overall"])]
+    base_rows = {**baseline["endpoints"], "ALL": baseline["overall"]} if baseline else {}
+    for endpoint, s in rows:
+        line = f"{endpoint:<44} {s['requests']:>7} {s['rps']:>9.1f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['errors']:>5}"
+        base = base_rows.get(endpoint)
+        if base:
+            dp95 = (s["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+            drps = (s["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+            flag = ""
+            # Ignore endpoints with too few samples for a stable p95
+            if dp95 > threshold and s["requests"] >= 50 and base["requests"] >= 50:
+                flag = "  REGRESSION"
+                regressions.append(endpoint)
+            line += f" {dp95:>+7.1f}% {drps:>+7.1f}%{flag}"
+        if endpoint == "ALL":
+            print("-" * len(header))
+        print(line)
+    return regressions
+
+
+def start_server(db_path: str, mode: str, port: int, workers: int) -> tuple[subprocess.Popen, str]:
+    env = {
+        **os.environ,
+        "APP_ENV": "local",
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "DB_MODE": mode,
+        "SLOW_QUERY_MS": os.environ.get("SLOW_QUERY_MS", "1000"),
+    }
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    server = subprocess.Popen(cmd, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API benchmark and compare against a baseline")
+    parser.add_argument("--db", help="dataset from benchmarks.generate (copied before the run)")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync", help="DB_MODE for the started server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="NAME", help="save results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 slowdown (%%) reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a regression is found")
+    args = parser.parse_args()
+
+    if not args.url and not args.db:
+        parser.error("either --db or --url is required")
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+
+    server = scratch = None
+    url = args.url
+    try:
+        if not url:
+            scratch = tempfile.mkdtemp(prefix="bench-")
+            db_copy = os.path.join(scratch, "bench.db")
+            shutil.copyfile(args.db, db_copy)
+            server, url = start_server(db_copy, args.mode, args.port, args.workers)
+        results = asyncio.run(run_load(url, args.duration, args.concurrency, args.mix, args.seed, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    summary = summarize(results)
+    summary["config"] = {
+        "db": args.db, "url": args.url, "mode": args.mode, "workers": args.workers, "mix": args.mix,
+        "duration": args.duration, "concurrency": args.concurrency, "seed": args.seed,
+    }
+    print(f"\n{args.mix} mix, {args.concurrency} concurrent clients, {results.elapsed:.1f}s, mode={args.mode}\n")
+    regressions = print_report(summary, baseline, args.threshold)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nsaved {path}")
+
+    if regressions:
+        print(f"\n{len(regressions)} endpoint(s) slower than baseline by more than {args.threshold:.0f}% at p95")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
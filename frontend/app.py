@@ -1,13 +1,20 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime, date
+from fnmatch import fnmatch
+import threading
+import time
+import uuid
 import io
 
 try:
-    from fpdf import FPDF
+    import pyarrow as pa
 except ImportError:
-    FPDF = None
+    pa = None
 
 
 st.set_page_config(
@@ -125,79 +132,198 @@ with st.sidebar:
 
 
 
-# --- PDF GENERATOR ---
-def create_pdf(dataframe, title):
-    if not FPDF:
-        return None
-    
-    class PDF(FPDF):
-        def header(self):
-            self.set_font('Arial', 'B', 15)
-            self.cell(0, 10, title, 0, 1, 'C')
-            self.ln(10)
-            
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('Arial', 'I', 8)
-            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-    pdf = PDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=10)
-    
-    # Column headers
-    cols = dataframe.columns.tolist()
-    col_width = 190 / len(cols) if cols else 190
-    
-    # Header
-    pdf.set_font("Arial", 'B', 10)
-    for col in cols:
-        pdf.cell(col_width, 10, str(col).upper(), 1, 0, 'C')
-    pdf.ln()
-    
-    # Rows
-    pdf.set_font("Arial", size=10)
-    for _, row in dataframe.iterrows():
-        for col in cols:
-            # Type handling for clean output
-            val = str(row[col])
-            # Truncate if too long to avoid break
-            if len(val) > 20: val = val[:17] + "..."
-            pdf.cell(col_width, 10, val, 1, 0, 'C')
-        pdf.ln()
-        
-    return pdf.output(dest='S').encode('latin-1')
-
 # --- HELPER FUNCTIONS ---
+REQUEST_TIMEOUT = (3.05, 30) # connect, read
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+READ_CACHE_TTL = 300 # seconds a GET is served without asking the backend; sync_changes drops stale entries sooner
+
+# Cached reads each mutation makes stale, keyed by the first path segment it writes to.
+# Orders move stock, shipments move order status, and everything feeds the dashboard.
+INVALIDATES = {
+    "suppliers": ["suppliers*", "stats/*"],
+    "products": ["products*", "stats/*"],
+    "orders": ["orders*", "products*", "suppliers/*/orders*", "stats/*"],
+    "shipments": ["shipments*", "orders*", "suppliers/*/orders*", "suppliers/*/shipments*", "stats/*"],
+}
+
+@st.cache_resource
+def get_http_session():
+    # One keep-alive connection pool for the whole Streamlit server instead of a new TCP connection per call
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.2, allowed_methods=["GET"], status_forcelist=[502, 503, 504]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class ReadCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.change_cursor = None # last /changes seq this cache has applied
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+
+    def invalidate(self, patterns):
+        with self._lock:
+            for key in [k for k in self._entries if any(fnmatch(k[0], p) for p in patterns)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+@st.cache_resource
+def get_read_cache():
+    return ReadCache()
+
+def cached_get(endpoint, params=None, arrow=False):
+    """GET through the shared read cache; returns (status_code, json, headers) or None.
+
+    Fresh entries are served locally. Expired ones are revalidated with If-None-Match,
+    so an unchanged resource costs a bodyless 304. With `arrow`, list endpoints are
+    asked for an Arrow stream and the data is a DataFrame when the backend sends one.
+    """
+    cache = get_read_cache()
+    key = (endpoint, tuple(sorted((params or {}).items())), arrow)
+    entry = cache.get(key)
+    if entry and entry["expires"] > time.monotonic():
+        return 200, entry["data"], entry["headers"]
+
+    headers = {"If-None-Match": entry["etag"]} if entry and entry["etag"] else {}
+    if arrow:
+        headers["Accept"] = f"{ARROW_STREAM}, application/json;q=0.5"
+    response = get_http_session().get(f"{API_URL}/{endpoint}", params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304 and entry:
+        entry["expires"] = time.monotonic() + READ_CACHE_TTL
+        return 200, entry["data"], entry["headers"]
+    if response.status_code != 200:
+        return response.status_code, None, response.headers
+    if response.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        data = pa.ipc.open_stream(response.content).read_pandas()
+    else:
+        data = response.json()
+    cache.set(key, {
+        "data": data,
+        "headers": CaseInsensitiveDict(response.headers),
+        "etag": response.headers.get("ETag"),
+        "expires": time.monotonic() + READ_CACHE_TTL,
+    })
+    return 200, data, response.headers
+
+def invalidate_reads(endpoint):
+    resource = endpoint.split("/")[0]
+    get_read_cache().invalidate(INVALIDATES.get(resource, [f"{resource}*"]))
+
+def sync_changes():
+    # Drop cached reads that writes from other sessions (or the backend's own jobs) made stale
+    cache = get_read_cache()
+    try:
+        while True:
+            response = get_http_session().get(f"{API_URL}/changes/", params={"since": cache.change_cursor, "limit": 1000}, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 410:
+                cache.change_cursor = None # fell behind the change log; start over from a clean cache
+            if response.status_code != 200:
+                cache.clear()
+                return
+            page = response.json()
+            if cache.change_cursor is None:
+                cache.clear()
+            for entity in {change["entity"] for change in page["changes"]}:
+                cache.invalidate(INVALIDATES.get(f"{entity}s", [f"{entity}s*"]))
+            cache.change_cursor = page["cursor"]
+            if not page["more"]:
+                return
+    except Exception:
+        cache.clear() # can't tell what changed; fall back to refetching
+
 def fetch_data(endpoint, params=None):
     try:
-        response = requests.get(f"{API_URL}/{endpoint}", params=params)
-        if response.status_code == 200:
-            return response.json()
+        status, data, _ = cached_get(endpoint, params)
+        if status == 200:
+            return data
         return []
     except:
         return []
 
-def send_data(endpoint, payload):
+def fetch_frame(endpoint, params=None):
+    # A list endpoint as a DataFrame; over Arrow when pyarrow is installed, so there is no JSON to parse and pivot
     try:
-        response = requests.post(f"{API_URL}/{endpoint}", json=payload)
-        return response
-    except Exception as e:
-        return None
+        status, data, _ = cached_get(endpoint, params, arrow=pa is not None)
+        if status == 200:
+            return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    except:
+        pass
+    return pd.DataFrame()
 
-def update_data(endpoint, payload):
+def fetch_all(endpoint, params=None):
+    # List endpoints are keyset-paginated; follow X-Next-Cursor until the last page
+    params = dict(params or {}, limit=1000)
+    rows = []
     try:
-        response = requests.put(f"{API_URL}/{endpoint}", json=payload)
-        return response
-    except Exception as e:
+        while True:
+            status, data, headers = cached_get(endpoint, params)
+            if status != 200:
+                break
+            rows.extend(data)
+            next_cursor = headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params["cursor"] = next_cursor
+    except:
+        pass
+    return rows
+
+def search_picker(label, entity, key):
+    """Typeahead: search /{entity}/search as the user types and pick one of the best matches.
+
+    Returns the picked compact row ([id, name, ...]) or None. Replaces selectboxes
+    built from the full product/supplier lists.
+    """
+    query = st.text_input(f"Search {label}", key=f"{key}_query", placeholder="Start typing a name...")
+    if not query.strip():
         return None
+    matches = fetch_data(f"{entity}/search", {"q": query, "limit": 20})
+    if not matches:
+        st.caption(f"No {entity} match '{query}'.")
+        return None
+    def describe(row):
+        return f"{row[1]} (ID: {row[0]}, Stock: {row[2]})" if len(row) > 2 else f"{row[1]} (ID: {row[0]})"
+    index = st.selectbox(f"Select {label}", options=range(len(matches)), format_func=lambda i: describe(matches[i]), key=f"{key}_pick")
+    return matches[index]
+
+def _mutate(method, endpoint, payload=None, headers=None, attempts=1):
+    for attempt in range(attempts):
+        try:
+            response = get_http_session().request(method, f"{API_URL}/{endpoint}", json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+            break
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == attempts - 1:
+                return None
+        except Exception as e:
+            return None
+    if response.ok:
+        invalidate_reads(endpoint)
+    return response
+
+def send_data(endpoint, payload):
+    # Same Idempotency-Key on the retry, so a create that timed out is not applied twice
+    return _mutate("POST", endpoint, payload, headers={"Idempotency-Key": uuid.uuid4().hex}, attempts=2)
+
+def update_data(endpoint, payload):
+    return _mutate("PUT", endpoint, payload)
 
 def delete_data(endpoint):
-    try:
-        response = requests.delete(f"{API_URL}/{endpoint}")
-        return response
-    except Exception as e:
-        return None
+    return _mutate("DELETE", endpoint)
 
 def show_success(message):
     st.markdown(f"""
@@ -213,6 +339,7 @@ def show_error(message):
         </div>
     """, unsafe_allow_html=True)
 
+sync_changes()
 
 if menu == "Dashboard":
     st.title("📊 SupplyStream")
@@ -221,10 +348,7 @@ if menu == "Dashboard":
     col1, col2, col3, col4 = st.columns(4)
     
     with st.spinner("Loading metrics..."):
-        products = fetch_data("products/")
-        orders = fetch_data("orders/")
-        shipments = fetch_data("shipments/")
-        suppliers = fetch_data("suppliers/")
+        stats = fetch_data("stats/summary", {"latest": 5}) or {}
     
 
     def metric_card(title, value, icon, color):
@@ -235,28 +359,30 @@ if menu == "Dashboard":
             </div>
         """, unsafe_allow_html=True)
     
-    with col1: metric_card("Products", len(products), "📦", "#00f2ff")
-    with col2: metric_card("Orders", len(orders), "🛒", "#bd00ff")
-    with col3: metric_card("Shipments", len(shipments), "🚚", "#00f2ff")
-    with col4: metric_card("Suppliers", len(suppliers), "🏭", "#bd00ff")
+    with col1: metric_card("Products", stats.get("products", 0), "📦", "#00f2ff")
+    with col2: metric_card("Orders", stats.get("orders", 0), "🛒", "#bd00ff")
+    with col3: metric_card("Shipments", stats.get("shipments", 0), "🚚", "#00f2ff")
+    with col4: metric_card("Suppliers", stats.get("suppliers", 0), "🏭", "#bd00ff")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    col5, col6, col7 = st.columns(3)
+    with col5: metric_card("Stock Value", f"${stats.get('stock_value', 0):,.2f}", "💰", "#00f2ff")
+    with col6: metric_card("Pending Volume", f"{stats.get('pending_volume', 0):,.2f}", "📐", "#bd00ff")
+    with col7: metric_card("Waiting Shipments", stats.get("waiting_shipments", 0), "⏳", "#00f2ff")
     
     st.markdown("### 📉 Recent Activity")
     c1, c2 = st.columns(2)
     with c1:
         st.markdown("#### Latest Orders")
-        if orders:
-            st.dataframe(pd.DataFrame(orders).tail(5), use_container_width=True)
+        if stats.get("latest_orders"):
+            st.dataframe(pd.DataFrame(stats["latest_orders"]), use_container_width=True)
         else:
             st.info("No recent orders")
             
     with c2:
         st.markdown("#### Pending Shipments")
-        if shipments:
-            df_ship = pd.DataFrame(shipments)
-            if not df_ship.empty and 'status' in df_ship.columns:
-                st.dataframe(df_ship[df_ship['status'] != 'Delivered'].tail(5), use_container_width=True)
-            else:
-                st.dataframe(df_ship.tail(5), use_container_width=True)
+        if stats.get("open_shipments"):
+            st.dataframe(pd.DataFrame(stats["open_shipments"]), use_container_width=True)
         else:
             st.info("No pending shipments")
 
@@ -303,67 +429,61 @@ elif menu == "Suppliers":
 
     with tab2:
         st.markdown("### 📋 Manage Suppliers")
-        suppliers = fetch_data("suppliers/")
-        if suppliers:
-            # Master List
-            supplier_map = {f"{s['name']}" : s for s in suppliers}
-            selected_s_name = st.selectbox("Select Supplier to View/Edit", options=list(supplier_map.keys()))
+        picked = search_picker("Supplier", "suppliers", key="manage_supplier")
+        s_data = fetch_data(f"suppliers/{picked[0]}") if picked else None
+        if s_data:
+            s_id = s_data['supplier_id']
             
-            if selected_s_name:
-                s_data = supplier_map[selected_s_name]
-                s_id = s_data['supplier_id']
-                
-                # Detail View
-                with st.expander("📝 Supplier Details & Actions", expanded=True):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        new_name = st.text_input("Name", value=s_data['name'])
-                        new_contact = st.text_input("Contact", value=s_data['contact_person'])
-                    with c2:
-                        new_phone = st.text_input("Phone", value=s_data['phone_number'])
-                        new_addr = st.text_input("Address", value=s_data['address'])
-                    
-                    c3, c4 = st.columns(2)
-                    with c3:
-                        if st.button("💾 Update Supplier"):
-                            payload = {
-                                "name": new_name,
-                                "contact_person": new_contact,
-                                "phone_number": new_phone,
-                                "address": new_addr
-                            }
-                            res = update_data(f"suppliers/{s_id}", payload)
-                            if res and res.status_code == 200:
-                                show_success("Supplier updated!")
-                                st.rerun()
-                            else:
-                                show_error("Update failed")
-                    with c4:
-                        if st.button("🗑️ Delete Supplier", type="primary"):
-                            res = delete_data(f"suppliers/{s_id}")
-                            if res and res.status_code == 200:
-                                show_success("Supplier deleted!")
-                                st.rerun()
-                            else:
-                                show_error("Delete failed")
-
-                # Related Data
-                st.markdown("#### � Supplied Orders")
-                s_orders = fetch_data(f"suppliers/{s_id}/orders")
-                if s_orders:
-                    st.dataframe(pd.DataFrame(s_orders), use_container_width=True)
-                else:
-                    st.info("No orders from this supplier.")
+            # Detail View
+            with st.expander("📝 Supplier Details & Actions", expanded=True):
+                c1, c2 = st.columns(2)
+                with c1:
+                    new_name = st.text_input("Name", value=s_data['name'])
+                    new_contact = st.text_input("Contact", value=s_data['contact_person'])
+                with c2:
+                    new_phone = st.text_input("Phone", value=s_data['phone_number'])
+                    new_addr = st.text_input("Address", value=s_data['address'])
                 
-                st.markdown("#### 🚚 Related Shipments")
-                s_shipments = fetch_data(f"suppliers/{s_id}/shipments")
-                if s_shipments:
-                    st.dataframe(pd.DataFrame(s_shipments), use_container_width=True)
-                else:
-                    st.info("No shipments related to this supplier.")
+                c3, c4 = st.columns(2)
+                with c3:
+                    if st.button("💾 Update Supplier"):
+                        payload = {
+                            "name": new_name,
+                            "contact_person": new_contact,
+                            "phone_number": new_phone,
+                            "address": new_addr
+                        }
+                        res = update_data(f"suppliers/{s_id}", payload)
+                        if res and res.status_code == 200:
+                            show_success("Supplier updated!")
+                            st.rerun()
+                        else:
+                            show_error("Update failed")
+                with c4:
+                    if st.button("🗑️ Delete Supplier", type="primary"):
+                        res = delete_data(f"suppliers/{s_id}")
+                        if res and res.status_code == 200:
+                            show_success("Supplier deleted!")
+                            st.rerun()
+                        else:
+                            show_error("Delete failed")
 
+            # Related Data
+            st.markdown("#### � Supplied Orders")
+            s_orders = fetch_frame(f"suppliers/{s_id}/orders")
+            if not s_orders.empty:
+                st.dataframe(s_orders, use_container_width=True)
+            else:
+                st.info("No orders from this supplier.")
+            
+            st.markdown("#### 🚚 Related Shipments")
+            s_shipments = fetch_data(f"suppliers/{s_id}/shipments")
+            if s_shipments:
+                st.dataframe(pd.DataFrame(s_shipments), use_container_width=True)
+            else:
+                st.info("No shipments related to this supplier.")
         else:
-            st.info("No suppliers found.")
+            st.info("Search for a supplier by name, contact or address.")
 
 
 
@@ -411,11 +531,11 @@ elif menu == "Products":
 
     with tab2:
         st.markdown("### �️ Inventory Management")
-        products = fetch_data("products/")
-        if products:
-            # Table View
+        products = fetch_frame("products/", {"limit": 1000})
+        if not products.empty:
+            # Table View (first page; use the search below to find any product)
             st.dataframe(
-                pd.DataFrame(products), 
+                products, 
                 use_container_width=True,
                 column_config={
                     "unit_price": st.column_config.NumberColumn("Price", format="$%.2f"),
@@ -426,11 +546,10 @@ elif menu == "Products":
             st.markdown("---")
             st.subheader("Manage Product")
             
-            prod_options = {f"{p['name']} (ID: {p['product_id']})": p for p in products}
-            selected_prod_key = st.selectbox("Select Product to Manage", options=list(prod_options.keys()))
+            picked = search_picker("Product", "products", key="manage_product")
+            selected_prod = fetch_data(f"products/{picked[0]}") if picked else None
             
-            if selected_prod_key:
-                selected_prod = prod_options[selected_prod_key]
+            if selected_prod:
                 p_id = selected_prod['product_id']
                 
                 action = st.radio("Action", ["Update Details", "Adjust Stock", "Delete Product"], horizontal=True)
@@ -475,10 +594,10 @@ elif menu == "Products":
     with tab3:
         st.markdown("### ⚠️ Low Stock Alerts")
         threshold = st.slider("Stock Threshold", 1, 100, 10)
-        low_stock = fetch_data(f"products/low-stock?threshold={threshold}")
-        if low_stock:
+        low_stock = fetch_frame(f"products/low-stock?threshold={threshold}")
+        if not low_stock.empty:
             st.error(f"Found {len(low_stock)} products with low stock!")
-            st.dataframe(pd.DataFrame(low_stock), use_container_width=True)
+            st.dataframe(low_stock, use_container_width=True)
         else:
             st.success("No products below threshold.")
 
@@ -492,86 +611,74 @@ elif menu == "Orders":
     with tab1:
         st.markdown("### Place New Order")
         
-        products = fetch_data("products/")
-        suppliers = fetch_data("suppliers/")
+        # Pickers sit outside the form so they search as the user types
+        c1, c2 = st.columns(2)
+        with c1:
+            picked_prod = search_picker("Product", "products", key="order_product")
+        with c2:
+            picked_sup = search_picker("Supplier", "suppliers", key="order_supplier")
         
-        if not products or not suppliers:
-            st.warning("⚠️ Please add Products and Suppliers first.")
-        else:
-            with st.form("order_form"):
-                c1, c2 = st.columns(2)
-                with c1:
-                    prod_map = {f"{p['name']} (Stock: {p['quantity_available']})": p['product_id'] for p in products}
-                    selected_prod = st.selectbox("Select Product", options=list(prod_map.keys()))
-                with c2:
-                    sup_map = {s['name']: s['supplier_id'] for s in suppliers}
-                    selected_sup = st.selectbox("Select Supplier", options=list(sup_map.keys()))
-                
-                quantity = st.number_input("Quantity Ordered", min_value=1, step=1)
-                
-                submitted = st.form_submit_button("🛒 Place Order")
-                
-                if submitted:
-                    payload = {
-                        "product_id": prod_map[selected_prod],
-                        "supplier_id": sup_map[selected_sup],
-                        "quantity_ordered": quantity,
-                        "order_date": datetime.now().isoformat()
-                    }
-                    res = send_data("orders/", payload)
-                    if res and res.status_code == 200:
-                        show_success("Order placed successfully!")
-                    elif res:
-                        show_error(f"Failed: {res.text}")
-                    else:
-                        show_error("Connection Failed")
+        with st.form("order_form"):
+            quantity = st.number_input("Quantity Ordered", min_value=1, step=1)
+            
+            submitted = st.form_submit_button("🛒 Place Order")
+            
+            if submitted and not (picked_prod and picked_sup):
+                show_error("Pick a product and a supplier first.")
+            elif submitted:
+                payload = {
+                    "product_id": picked_prod[0],
+                    "supplier_id": picked_sup[0],
+                    "quantity_ordered": quantity,
+                    "order_date": datetime.now().isoformat()
+                }
+                res = send_data("orders/", payload)
+                if res and res.status_code == 200:
+                    show_success("Order placed successfully!")
+                elif res:
+                    show_error(f"Failed: {res.text}")
+                else:
+                    show_error("Connection Failed")
 
     with tab2:
         st.markdown("### 📋 Manage Orders")
         
         # Filters
         filter_type = st.radio("Filter By", ["All Orders", "Date Range", "Product", "Supplier"], horizontal=True)
-        orders_data = []
+        orders_data = pd.DataFrame()
         
         if filter_type == "All Orders":
-            orders_data = fetch_data("orders/")
+            orders_data = fetch_frame("orders/")
             
         elif filter_type == "Date Range":
             c1, c2 = st.columns(2)
             start_d = c1.date_input("Start Date", value=datetime.now())
             end_d = c2.date_input("End Date", value=datetime.now())
             if st.button("Apply Date Filter"):
-                orders_data = fetch_data(f"orders/date-range?start_date={start_d}&end_date={end_d}")
+                orders_data = fetch_frame(f"orders/date-range?start_date={start_d}&end_date={end_d}")
                 
         elif filter_type == "Product":
-            products = fetch_data("products/")
-            if products:
-                p_map = {p['name']: p['product_id'] for p in products}
-                sel_p = st.selectbox("Select Product", list(p_map.keys()))
-                if sel_p:
-                    orders_data = fetch_data(f"orders/product/{p_map[sel_p]}")
+            sel_p = search_picker("Product", "products", key="filter_product")
+            if sel_p:
+                orders_data = fetch_frame(f"orders/product/{sel_p[0]}")
                     
         elif filter_type == "Supplier":
-            suppliers = fetch_data("suppliers/")
-            if suppliers:
-                s_map = {s['name']: s['supplier_id'] for s in suppliers}
-                sel_s = st.selectbox("Select Supplier", list(s_map.keys()))
-                if sel_s:
-                    orders_data = fetch_data(f"orders/supplier/{s_map[sel_s]}")
+            sel_s = search_picker("Supplier", "suppliers", key="filter_supplier")
+            if sel_s:
+                orders_data = fetch_frame(f"orders/supplier/{sel_s[0]}")
         
         # Display & Actions
-        if orders_data:
-            st.dataframe(pd.DataFrame(orders_data), use_container_width=True)
+        if not orders_data.empty:
+            st.dataframe(orders_data, use_container_width=True)
             
             st.markdown("---")
             st.subheader("Order Actions")
             
-            o_map = {f"Order #{o['order_id']}": o for o in orders_data}
+            o_map = {f"Order #{o_id}": int(o_id) for o_id in orders_data["order_id"]}
             sel_o_key = st.selectbox("Select Order to Manage", list(o_map.keys()))
             
             if sel_o_key:
-                sel_o = o_map[sel_o_key]
-                o_id = sel_o['order_id']
+                o_id = o_map[sel_o_key]
                 
                 # Fetch single order details to be sure
                 full_order = fetch_data(f"orders/{o_id}")
@@ -606,9 +713,26 @@ elif menu == "Shipments":
     with tab1:
         st.markdown("### 📦 Create Smart Shipment")
         
+        with st.expander("⚙️ Auto-Consolidate Pending Orders"):
+            st.caption("Packs all pending orders per supplier into shipments that reach the supplier's minimum capacity.")
+            with st.form("auto_consolidate"):
+                auto_arrival = st.date_input("Est. Arrival", value=datetime.now())
+                if st.form_submit_button("⚡ Run Auto-Consolidation"):
+                    payload = {
+                        "shipment_date": datetime.now().isoformat(),
+                        "estimated_arrival_date": datetime.combine(auto_arrival, datetime.min.time()).isoformat()
+                    }
+                    res = send_data("shipments/auto-consolidate", payload)
+                    if res and res.status_code == 200:
+                        created = res.json()
+                        show_success(f"Created {len(created)} shipments covering {sum(len(s['order_ids']) for s in created)} orders")
+                    elif res:
+                        show_error(f"Failed: {res.text}")
+                    else:
+                        show_error("Connection Failed")
+
         # Fetch pending orders
-        all_orders = fetch_data("orders/")
-        pending_orders = [o for o in all_orders if o.get('status') == 'Pending' or o.get('status') is None]
+        pending_orders = fetch_all("orders/", {"status": "Pending"})
         
         if not pending_orders:
             st.info("✅ No pending orders to ship.")
@@ -696,7 +820,7 @@ elif menu == "Shipments":
         elif filter_mode == "On-Time Shipments":
             ship_data = fetch_data("shipments/on-time")
         elif filter_mode == "Find by Order":
-            orders = fetch_data("orders/")
+            orders = fetch_all("orders/")
             if orders:
                 o_map = {f"Order #{o['order_id']}": o['order_id'] for o in orders}
                 sel_o = st.selectbox("Select Order", list(o_map.keys()))
@@ -761,59 +885,47 @@ elif menu == "Shipments":
 
 elif menu == "Reports":
     st.title("📑 Reports & Exports")
-    st.markdown("Download your data in **CSV** or **PDF** formats.")
+    st.markdown("Download your data in **CSV**, **NDJSON**, **Parquet** or **PDF** formats.")
     
-    if FPDF is None:
-        st.warning("⚠️ The 'fpdf' library is not installed. PDF generation is disabled. (Run `pip install fpdf` to enable)")
-
     report_type = st.selectbox("Select Data Source", ["Products", "Orders", "Shipments", "Suppliers"])
-    
+    endpoint_map = {
+        "Products": "products",
+        "Orders": "orders",
+        "Shipments": "shipments",
+        "Suppliers": "suppliers"
+    }
+    entity = endpoint_map[report_type]
+
+    # Filters are applied server-side by the export endpoints
+    export_params = {}
+    if report_type in ("Orders", "Shipments"):
+        c1, c2, c3 = st.columns(3)
+        use_dates = c1.checkbox("Filter by date")
+        if use_dates:
+            start_d = c2.date_input("From", value=datetime.now())
+            end_d = c3.date_input("To", value=datetime.now())
+            export_params["start_date"] = datetime.combine(start_d, datetime.min.time()).isoformat()
+            export_params["end_date"] = datetime.combine(end_d, datetime.max.time()).isoformat()
+        sup_filter = st.number_input("Supplier ID (0 = all)", min_value=0, step=1, value=0)
+        if sup_filter:
+            export_params["supplier_id"] = int(sup_filter)
+
+    # Downloads stream straight from the backend; nothing is loaded into this process
+    st.subheader("📥 Download")
+    query = "&".join(f"{k}={v}" for k, v in export_params.items())
+    c1, c2, c3, c4, c5 = st.columns(5)
+    for col, fmt, label in [(c1, "csv", "📄 CSV"), (c2, "ndjson", "🧾 NDJSON"), (c3, "parquet", "🧱 Parquet"), (c4, "arrow", "🏹 Arrow")]:
+        col.link_button(f"{label} — {report_type}", f"{API_URL}/exports/{entity}.{fmt}" + (f"?{query}" if query else ""))
+    # Rendered by the backend's report workers and cached until the data changes
+    c5.link_button(f"📕 PDF — {report_type}", f"{API_URL}/reports/{entity}.pdf" + (f"?{query}" if query else ""))
+
+    st.markdown("---")
     if st.button("Generate Preview"):
         with st.spinner("Fetching data..."):
-            endpoint_map = {
-                "Products": "products/",
-                "Orders": "orders/",
-                "Shipments": "shipments/",
-                "Suppliers": "suppliers/"
-            }
-            
-            data = fetch_data(endpoint_map[report_type])
+            data = fetch_frame(f"{entity}/", {"limit": 10})
             
-            if data:
-                df = pd.DataFrame(data)
-                
-                # Preview
+            if not data.empty:
                 st.markdown(f"### Preview: {report_type}")
-                st.dataframe(df.head(10), use_container_width=True)
-                st.caption(f"Total Records: {len(df)}")
-                
-                # Export Area
-                st.markdown("---")
-                st.subheader("📥 Download")
-                
-                c1, c2 = st.columns(2)
-                
-                # CSV
-                csv = df.to_csv(index=False).encode('utf-8')
-                c1.download_button(
-                    label=f"📄 Download {report_type} (CSV)",
-                    data=csv,
-                    file_name=f"{report_type.lower()}_report.csv",
-                    mime="text/csv",
-                )
-                
-                # PDF
-                if FPDF:
-                    try:
-                        pdf_bytes = create_pdf(df, f"{report_type} Report")
-                        if pdf_bytes:
-                            c2.download_button(
-                                label=f"📕 Download {report_type} (PDF)",
-                                data=pdf_bytes,
-                                file_name=f"{report_type.lower()}_report.pdf",
-                                mime="application/pdf",
-                            )
-                    except Exception as e:
-                        c2.error(f"PDF Generation Error: {e}")
+                st.dataframe(data, use_container_width=True)
             else:
                 st.info("No data available to export.")
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# The app reads its settings at import time, so point it at a scratch SQLite
+# database before anything imports app.*
+_scratch = tempfile.mkdtemp(prefix="supplystream-tests-")
+os.environ.update(
+    APP_ENV="test",
+    DB_MODE="sync",
+    DATABASE_URL=f"sqlite:///{_scratch}/test.db",
+    REPORT_CACHE_DIR=os.path.join(_scratch, "reports"),
+    STOCK_COMPACT_SECONDS="0",
+    DELIVERY_SWEEP_SECONDS="0",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import engine
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@contextmanager
+def capture_sql():
+    """Every statement sent to the database inside the block, as (sql, parameters)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def make_supplier(client, min_capacity=0) -> int:
+    r = client.post("/suppliers/", json={"name": "Supplier", "address": "Dock 1", "min_capacity": min_capacity})
+    assert r.status_code == 200, r.text
+    return r.json()["supplier_id"]
+
+
+def make_product(client, quantity=1000) -> int:
+    r = client.post("/products/", json={"name": "Widget", "unit_price": 2.5, "quantity_available": quantity, "volume_per_unit": 1})
+    assert r.status_code == 200, r.text
+    return r.json()["product_id"]
+
+
+def make_order(client, supplier_id: int, product_id: int, quantity=1) -> int:
+    r = client.post("/orders/", json={"supplier_id": supplier_id, "product_id": product_id, "quantity_ordered": quantity})
+    assert r.status_code == 200, r.text
+    return r.json()["order_id"]
+
+
+def make_shipment(client, order_ids: list[int], late=False) -> int:
+    # Arrived a day after (late) or before (on time) its ETA
+    eta = datetime.utcnow() - timedelta(days=2)
+    arrival = eta + timedelta(days=1 if late else -1)
+    r = client.post("/shipments/", json={
+        "order_ids": order_ids,
+        "shipment_date": (eta - timedelta(days=5)).isoformat(),
+        "estimated_arrival_date": eta.isoformat(),
+        "actual_arrival_date": arrival.isoformat(),
+        "status": "Delivered",
+        "priority": "urgent",
+    })
+    assert r.status_code == 200, r.text
+    return r.json()["shipment_id"]
+
+
+SEEDED_ROWS = 6
+
+
+@pytest.fixture(scope="session")
+def seeded(client):
+    """One supplier and product with SEEDED_ROWS delivered shipments of two orders each,
+    alternately late and on time, one Pending order, and SEEDED_ROWS more suppliers and
+    products: enough rows for every list endpoint to return several."""
+    supplier_id = make_supplier(client)
+    product_id = make_product(client, quantity=100)
+    order_ids = []
+    for i in range(SEEDED_ROWS):
+        # Two orders per shipment, so order_ids has more than one entry to load
+        pair = [make_order(client, supplier_id, product_id) for _ in range(2)]
+        make_shipment(client, pair, late=i % 2 == 0)
+        order_ids += pair
+    make_order(client, supplier_id, product_id) # stays Pending
+    for _ in range(SEEDED_ROWS):
+        make_supplier(client)
+        make_product(client, quantity=100)
+    return {"supplier_id": supplier_id, "product_id": product_id, "order_id": order_ids[0]}
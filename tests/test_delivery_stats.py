@@ -0,0 +1,33 @@
+"""Per-supplier delivery rollups follow shipments across updates."""
+from app.database import SessionLocal
+from app.models import SupplierDeliveryStats
+from conftest import make_order, make_product, make_shipment, make_supplier
+
+
+def delivery_stats(client, supplier_id: int) -> dict:
+    r = client.get(f"/suppliers/{supplier_id}/delivery-stats")
+    assert r.status_code == 200, r.text
+    return {state: r.json()[state] for state in ("pending", "on_time", "late")}
+
+
+def test_reassigning_a_shipment_moves_its_count_to_the_new_supplier(client):
+    product_id = make_product(client)
+    first, second = make_supplier(client), make_supplier(client)
+    shipment_id = make_shipment(client, [make_order(client, first, product_id)], late=True)
+    other_order = make_order(client, second, product_id)
+    assert delivery_stats(client, first)["late"] == 1
+
+    assert client.put(f"/shipments/{shipment_id}", json={"order_id": other_order}).status_code == 200
+    assert delivery_stats(client, first) == {"pending": 0, "on_time": 0, "late": 0}
+    assert delivery_stats(client, second) == {"pending": 0, "on_time": 0, "late": 1}
+
+
+def test_missing_rollup_row_is_created_on_write(client):
+    product_id = make_product(client)
+    supplier_id = make_supplier(client)
+    db = SessionLocal()
+    db.query(SupplierDeliveryStats).filter(SupplierDeliveryStats.supplier_id == supplier_id).delete()
+    db.commit()
+    db.close()
+    make_shipment(client, [make_order(client, supplier_id, product_id)], late=False)
+    assert delivery_stats(client, supplier_id) == {"pending": 0, "on_time": 1, "late": 0}
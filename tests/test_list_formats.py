@@ -0,0 +1,36 @@
+"""List endpoints answer JSON or Arrow depending on Accept, so every variant must say Vary: Accept."""
+import pytest
+
+ARROW = {"Accept": "application/vnd.apache.arrow.stream"}
+
+
+# (path, a field the schema has)
+ENDPOINTS = [
+    ("/orders/", "status"),
+    ("/shipments/", "status"),
+    ("/products/", "name"),
+    ("/suppliers/", "name"),
+    ("/suppliers/{supplier_id}/orders", "status"),
+]
+
+
+@pytest.mark.parametrize("path, field", ENDPOINTS, ids=[path for path, _ in ENDPOINTS])
+@pytest.mark.parametrize("projected", [False, True], ids=["full", "fields"])
+def test_list_responses_vary_on_accept(client, seeded, path, field, projected):
+    url = path.format(**seeded)
+    params = {"fields": field} if projected else {}
+    json_response = client.get(url, params=params)
+    assert json_response.status_code == 200, json_response.text
+    assert json_response.headers["content-type"].startswith("application/json")
+    assert json_response.headers["vary"] == "Accept"
+    etag = json_response.headers.get("etag")
+    if etag:
+        # Cached list: the 304 for a revalidation carries Vary too
+        revalidated = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["vary"] == "Accept"
+
+    pytest.importorskip("pyarrow")
+    arrow_response = client.get(url, params=params, headers=ARROW)
+    assert arrow_response.headers["content-type"] == ARROW["Accept"]
+    assert arrow_response.headers["vary"] == "Accept"
@@ -0,0 +1,39 @@
+"""Statements per list request, counted with a before_cursor_execute hook: a page of
+one row and a page of many must cost the same number of queries (no N+1)."""
+import pytest
+from app.services.cache import response_cache
+from conftest import SEEDED_ROWS, capture_sql
+
+
+ENDPOINTS = [
+    ("/orders/", {}),
+    ("/orders/supplier/{supplier_id}", {}),
+    ("/orders/product/{product_id}", {}),
+    ("/orders/date-range", {"start_date": "2000-01-01T00:00:00", "end_date": "2100-01-01T00:00:00"}),
+    ("/shipments/", {}),
+    ("/shipments/delayed", {}),
+    ("/shipments/on-time", {}),
+    ("/products/", {}),
+    ("/products/low-stock", {"threshold": 1000}),
+    ("/suppliers/", {}),
+    ("/suppliers/{supplier_id}/orders", {}),
+    ("/suppliers/{supplier_id}/shipments", {}),
+]
+
+
+def count_statements(client, url: str, params: dict) -> tuple[int, int]:
+    response_cache.clear() # product and supplier lists are cached; count a cold read
+    with capture_sql() as statements:
+        r = client.get(url, params=params)
+    assert r.status_code == 200, r.text
+    return len(statements), len(r.json())
+
+
+@pytest.mark.parametrize("path, params", ENDPOINTS, ids=[path for path, _ in ENDPOINTS])
+def test_list_endpoint_query_count_is_constant(client, seeded, path, params):
+    url = path.format(**seeded)
+    one, one_rows = count_statements(client, url, {**params, "limit": 1})
+    many, many_rows = count_statements(client, url, {**params, "limit": SEEDED_ROWS})
+    assert one_rows == 1
+    assert many_rows >= 3 # min(SEEDED_ROWS, rows matching), enough to show a per-row query
+    assert one == many, f"{url}: {one} statements for 1 row, {many} for {many_rows} rows"
@@ -0,0 +1,48 @@
+"""EXPLAIN QUERY PLAN for the filtered list endpoints: each must reach orders and
+shipments through an index, never a full table SCAN."""
+import re
+import pytest
+from app.database import engine
+from conftest import capture_sql
+
+TABLE_SCAN = re.compile(r"^SCAN (orders|shipment)\b")
+
+
+ENDPOINTS = [
+    ("/orders/supplier/{supplier_id}", {}),
+    ("/orders/product/{product_id}", {}),
+    ("/orders/date-range", {"start_date": "2000-01-01T00:00:00", "end_date": "2100-01-01T00:00:00"}),
+    ("/orders/", {"status": "Pending"}),
+    ("/shipments/delayed", {}),
+    ("/shipments/on-time", {}),
+    ("/shipments/order/{order_id}", {}),
+]
+
+
+def query_plan(sql: str, parameters) -> list[str]:
+    raw = engine.raw_connection()
+    try:
+        return [row[3] for row in raw.cursor().execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+    finally:
+        raw.close()
+
+
+@pytest.mark.parametrize("path, params", ENDPOINTS, ids=[path for path, _ in ENDPOINTS])
+def test_list_endpoint_uses_indexes(client, seeded, path, params):
+    url = path.format(**seeded)
+    params = {**params, "limit": 1}
+    with capture_sql() as statements:
+        # First page and a cursor page, which adds the keyset predicate
+        r = client.get(url, params=params)
+        assert r.status_code == 200, r.text
+        assert r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor:
+            assert client.get(url, params={**params, "cursor": cursor}).status_code == 200
+
+    selects = [(sql, p) for sql, p in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert selects
+    for sql, parameters in selects:
+        plan = query_plan(sql, parameters)
+        scans = [step for step in plan if TABLE_SCAN.match(step)]
+        assert not scans, f"{url} scans a table:\n{sql}\n{plan}"
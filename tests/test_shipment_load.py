@@ -0,0 +1,45 @@
+"""A Waiting shipment's load follows the orders attached to it, including cancellations."""
+from datetime import datetime, timedelta
+from conftest import make_order, make_product, make_supplier
+
+
+def create_shipment(client, order_ids):
+    eta = datetime.utcnow() + timedelta(days=3)
+    return client.post("/shipments/", json={"order_ids": order_ids, "shipment_date": datetime.utcnow().isoformat(), "estimated_arrival_date": eta.isoformat(), "status": "Pending"})
+
+
+def test_cancelling_a_topped_up_order_releases_its_load(client):
+    supplier_id = make_supplier(client, min_capacity=10)
+    product_id = make_product(client)
+    first = make_order(client, supplier_id, product_id, quantity=2)
+    shipment = create_shipment(client, [first]).json()
+    assert shipment["status"] == "Waiting"
+
+    topped_up = make_order(client, supplier_id, product_id, quantity=3)
+    assert client.get(f"/orders/{topped_up}").json()["shipment_id"] == shipment["shipment_id"]
+    assert float(client.get(f"/shipments/{shipment['shipment_id']}").json()["current_load"]) == 5
+
+    assert client.delete(f"/orders/{topped_up}").status_code == 200
+    after = client.get(f"/shipments/{shipment['shipment_id']}").json()
+    assert float(after["current_load"]) == 2
+    assert float(after["load_percentage"]) == 20
+
+    # 2 + 7 is still under capacity, so the shipment keeps waiting
+    make_order(client, supplier_id, product_id, quantity=7)
+    after = client.get(f"/shipments/{shipment['shipment_id']}").json()
+    assert float(after["current_load"]) == 9
+    assert after["status"] == "Waiting"
+
+
+def test_an_order_on_a_shipment_cannot_be_shipped_again(client):
+    supplier_id = make_supplier(client, min_capacity=50)
+    product_id = make_product(client)
+    first = make_order(client, supplier_id, product_id, quantity=10)
+    shipment = create_shipment(client, [first]).json()
+    topped_up = make_order(client, supplier_id, product_id, quantity=20)
+    assert client.get(f"/orders/{topped_up}").json()["shipment_id"] == shipment["shipment_id"]
+
+    r = create_shipment(client, [topped_up])
+    assert r.status_code == 409
+    assert client.get(f"/orders/{topped_up}").json()["shipment_id"] == shipment["shipment_id"]
+    assert float(client.get(f"/shipments/{shipment['shipment_id']}").json()["current_load"]) == 30
@@ -0,0 +1,55 @@
+"""Concurrent orders for the last units of a product: the conditional UPDATE must
+let exactly the available quantity through and never drive stock negative."""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from conftest import capture_sql, make_product, make_supplier
+
+STOCK = 20
+BUYERS = 60
+
+
+def order_concurrently(client, supplier_id: int, product_id: int) -> list[int]:
+    def buy(_):
+        return client.post("/orders/", json={"supplier_id": supplier_id, "product_id": product_id, "quantity_ordered": 1}).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(buy, range(BUYERS)))
+
+
+@pytest.mark.parametrize("shards", [1, 4])
+def test_concurrent_orders_never_oversell(client, shards):
+    supplier_id = make_supplier(client)
+    product_id = make_product(client, quantity=STOCK)
+    if shards > 1:
+        assert client.put(f"/products/{product_id}/stock-shards", params={"count": shards}).status_code == 200
+
+    statuses = order_concurrently(client, supplier_id, product_id)
+
+    assert statuses.count(200) == STOCK
+    assert statuses.count(400) == BUYERS - STOCK
+    assert client.get(f"/products/{product_id}").json()["quantity_available"] == 0
+    orders = client.get(f"/orders/product/{product_id}", params={"limit": BUYERS}).json()
+    assert sum(o["quantity_ordered"] for o in orders) == STOCK
+    movements = client.get(f"/products/{product_id}/stock-movements", params={"limit": BUYERS * 2}).json()
+    assert sum(m["delta"] for m in movements) == 0 # initial stock minus every order
+
+
+def test_order_reserves_stock_in_one_statement(client):
+    supplier_id = make_supplier(client)
+    product_id = make_product(client, quantity=5)
+    with capture_sql() as statements:
+        r = client.post("/orders/", json={"supplier_id": supplier_id, "product_id": product_id, "quantity_ordered": 2})
+    assert r.status_code == 200, r.text
+    assert r.json()["total_volume"] == 2
+    product_reads = [sql for sql, _ in statements if sql.lstrip().upper().startswith("SELECT") and "FROM product" in sql]
+    assert not product_reads, product_reads # stock check and volume_per_unit come back from the UPDATE
+
+
+@pytest.mark.parametrize("quantity", [0, -3])
+def test_order_quantity_must_be_positive(client, quantity):
+    supplier_id = make_supplier(client)
+    product_id = make_product(client, quantity=5)
+    r = client.post("/orders/", json={"supplier_id": supplier_id, "product_id": product_id, "quantity_ordered": quantity})
+    assert r.status_code == 422
+    assert "greater than 0" in r.text
+    assert client.get(f"/products/{product_id}").json()["quantity_available"] == 5